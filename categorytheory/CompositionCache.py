@@ -0,0 +1,89 @@
+import collections
+import hashlib
+import threading
+
+from categorytheory.Diagram import StringDiagram
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+class CompositionCache:
+    # Bounded LRU cache of composed StringDiagrams, keyed by the fingerprints of the arrows in the order they are
+    # composed. A list that is not cached is composed with StringDiagram.compose_many. Only the whole list is looked
+    # up: appending to a cached prefix re-weaves differently, so the diagram would depend on earlier requests.
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive!")
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()  # key -> StringDiagram, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(diagrams: list, pack_braids: bool = False) -> bytes:
+        # identifies the composition of the whole list
+        return CompositionCache.sequence_keys(diagrams, pack_braids=pack_braids)[-1]
+
+    @staticmethod
+    def sequence_keys(diagrams: list, pack_braids: bool = False) -> list:
+        # key k identifies the composition of diagrams[0..k]
+        keys = []
+        key = b"packed" if pack_braids else b""
+        for d in diagrams:
+            h = hashlib.blake2b(key, digest_size=16)
+            h.update(d.digest())
+            key = h.digest()
+            keys.append(key)
+        return keys
+
+    def compose(self, diagrams: list, pack_braids: bool = False) -> StringDiagram:
+        if not diagrams:
+            raise ValueError("Need at least one diagram to compose!")
+        key = CompositionCache.key(diagrams, pack_braids=pack_braids)
+
+        with self._lock:
+            sd = self._entries.get(key)
+            if sd is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sd
+            self.misses += 1
+
+        if len(diagrams) == 1 and isinstance(diagrams[0], StringDiagram):
+            sd = diagrams[0]
+        else:
+            sd = StringDiagram.compose_many(diagrams, pack_braids=pack_braids)
+
+        with self._lock:
+            self._entries[key] = sd
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return sd
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, item):
+        # `diagrams in cache` for the diagrams composed without packed braids, `(diagrams, pack_braids) in cache`
+        # for either
+        diagrams, pack_braids = (item if isinstance(item, tuple) and item and isinstance(item[-1], bool)
+                                 else (item, False))
+        if not diagrams:
+            return False
+        key = CompositionCache.key(diagrams, pack_braids=pack_braids)
+        with self._lock:
+            return key in self._entries
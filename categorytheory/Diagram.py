@@ -1,24 +1,38 @@
 import collections
+import hashlib
+import itertools
 import json
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import List
 
 import numpy as np
-from sympy.categories import Object, CompositeMorphism, Morphism
 
 from categorytheory.MonoidalCategory import MonoidalMorphism, NamedMorphism, IdentityMorphism, MonoidalObject, \
-    MonoidalCategory
+    MonoidalCategory, Morphism, from_sympy, atom_name
+from categorytheory.DiagramGraph import DiagramGraph, NodeView, Colors
+from categorytheory.JsonStream import JsonStream
+from categorytheory.Permutation import Permutation
 from categorytheory.SymmetricMonoidalCategory import SymmetricMonoidalCategory
+from categorytheory.WireAlphabet import WireAlphabet
 
 
 class Diagram:
     def __init__(self, morphism: NamedMorphism or MonoidalMorphism or IdentityMorphism, name: str or None = None):
+        if not isinstance(morphism, Morphism):
+            morphism = from_sympy(morphism)
         self.morphism = morphism
         self.domain = self.morphism.domain
         self.codomain = self.morphism.codomain
-        if name is None:
-            self.name = self.morphism.name
-        else:
-            self.name = name
+        self._name = name
+        self._digest = None
+
+    @property
+    def name(self):
+        # the name of the morphism unless one was given, braid layers are made far more often than shown
+        return self.morphism.name if self._name is None else self._name
 
     @property
     def linear_syntax(self):
@@ -29,281 +43,167 @@ class Diagram:
         return MonoidalMorphism(self.morphism)
 
     @staticmethod
-    def _find_morphism_with_string(morphisms: list, morphisms_rank: int, string: IdentityMorphism, mapped_nodes: list,
-                                   use_domain: bool = False) -> (Morphism, int) or (None, None):
+    def _index_ports(morphisms: list) -> dict:
+        # string name -> column of the morphism for every output port of the slice carrying it, left to right
+        ports = collections.defaultdict(collections.deque)
         for col, m in enumerate(morphisms):
-            node_id = "{}_({})_({})".format(m.name, morphisms_rank, col)
-            if use_domain:
-                compare_strings = Diagram.make_strings(m.domain.objects)
-            else:
-                compare_strings = Diagram.make_strings(m.codomain.objects)
-            if string in compare_strings:
-                string_index = 0
-                if type(m) == NamedMorphism:
-                    # handle when morphism has a codomain string that is the same as another morphism in that slice
-                    ind = [i for i, s in enumerate(compare_strings) if string == s]
-                    for i in ind:
-                        node_id_with_index = "{}_({})".format(node_id, i)  # note index of codomain string that matched
-                        if node_id_with_index not in mapped_nodes:
-                            string_index = i
-                            return node_id, string_index
-                else:
-                    if node_id not in mapped_nodes:
-                        return node_id, string_index
-        return None, None
-
-    @staticmethod
-    def _get_node_position(child_morphism: Morphism, begin_at: float, padding: float) -> (float, float):
-
-        pocket = padding * 2
-        width = (max(len(child_morphism.domain.objects), len(child_morphism.codomain.objects)) * pocket)
-
-        if type(child_morphism).__name__ == "IdentityMorphism":
-            center = width / 2
-        else:
-            if len(child_morphism.domain.objects) >= len(child_morphism.codomain.objects):
-                child_strings = Diagram.make_strings(child_morphism.domain.objects)
-            else:
-                child_strings = Diagram.make_strings(child_morphism.codomain.objects)
-            x_positions = Diagram._compute_string_spacing(strings=child_strings, padding=padding)
-
-            center = sum(x_positions) / len(x_positions)
-
-        return begin_at + center, width
+            for name in m.codomain.names:
+                ports[name].append(col)
+        return ports
 
     @staticmethod
-    def _compute_string_spacing(strings: list, padding: float):
-        pocket = padding * 2
-        return [Diagram._get_node_position(child_morphism=s, begin_at=(i * pocket), padding=padding)[0]
-                for i, s in enumerate(strings)]
+    def _find_morphism_with_string(ports: dict, string_name: str) -> int or None:
+        # column of the first output port in the slice above carrying the string that is not wired to anything yet,
+        # the port is used up
+        available = ports.get(string_name)
+        if not available:
+            return None
+        return available.popleft()
 
     @staticmethod
-    def to_graph_from_slices(slices: list, padding: float = 0.5, offset: float = 0):
+    def graph_from_slices(slices: list, padding: float = 0.5, offset: float = 0, graph: DiagramGraph or None = None,
+                          above: list or None = None) -> DiagramGraph:
         # number of nodes = len(domain) + 1 + len(codomain)
         # number of edges = len(domain) + len(codomain)
         # slices should always alternate: (identity morphisms, named morphisms)
-
-        Position = collections.namedtuple("Position", ["y", "x"])
-        Node = collections.namedtuple("Node",
-                                      ["id", "name", "index_position", "position", "type", "width"])  # morphisms
-        Edge = collections.namedtuple("Edge", ["id", "source_node", "target_node", "name",
-                                               "source_position", "target_position"])  # composition
-
-        nodes = dict()
-        edges = dict()
-        previous_slice = []
-        mapped_nodes = []
-        max_col = -1
-        max_row = len(slices)
-        for rank, slice in enumerate(slices):
-            curr_offset = offset
+        # Given a `graph` whose last row is the slice `above`, the slices are added below it, with its padding and
+        # offset, and only the new rows are laid out and wired.
+        if graph is None:
+            graph = DiagramGraph(padding=padding, offset=offset)
+        first_rank = graph.rows
+        wires = [max(len(m.domain), len(m.codomain)) for slice in slices for m in slice]
+        x, widths = DiagramGraph.layout(wires=wires, counts=[len(slice) for slice in slices], padding=graph.padding,
+                                        offset=graph.offset)
+        positions = zip(x.tolist(), widths.tolist())
+
+        previous_nodes = list(range(*graph.row_range(first_rank - 1))) if first_rank else []
+        ports = Diagram._index_ports(above if first_rank else [])
+        for rank, slice in enumerate(slices, start=first_rank):
+            current_nodes = []
             for col, m in enumerate(slice):
-                max_col = max(col, max_col)
-                x_pos, _width = Diagram._get_node_position(child_morphism=m, begin_at=curr_offset, padding=padding)
-                curr_offset = x_pos + _width / 2
+                x_pos, _width = next(positions)
 
-                _node_id = "{}_({})_({})".format(m.name, rank, col)
-                _index_position = Position(y=rank, x=col)._asdict()
-                _position = Position(y=rank, x=x_pos)._asdict()
                 _type = type(m).__name__
-
-                if _type == "IdentityMorphism":
-                    _name = m.domain.name
-                else:
-                    _name = m.name
-
-                # if _type == "NamedMorphism" and "\u03C4" in _name:  # "\u03C4" is Greek letter tau for braids, hacky :(
-                #     continue
-
-                node = Node(id=_node_id, name=_name, index_position=_index_position, position=_position, type=_type, \
-                            width=_width)._asdict()
-
-                nodes[_node_id] = node
+                _name = m.domain.name if _type == "IdentityMorphism" else m.name
+                node = graph.add_node(kind=_type, name=_name, rank=rank, col=col, x=x_pos, width=_width)
+                current_nodes.append(node)
 
                 if rank == 0:  # ignore first row, these are inputs
                     continue
 
-                prev_rank = rank - 1
-                domain_strings = Diagram.make_strings(m.domain.objects)
-
-                for i, string in enumerate(domain_strings):
-                    _source_node_id, _mapped_string_ind = Diagram._find_morphism_with_string(morphisms=previous_slice,
-                                                                                             morphisms_rank=prev_rank,
-                                                                                             string=string,
-                                                                                             mapped_nodes=mapped_nodes)
-
-                    # look one row above, braids don't have nodes
-                    # if _source_node_id is None or "\u03C4" in _source_node_id:
-                    #     _source_node_id, _mapped_string_ind = Diagram._find_morphism_with_string(
-                    #         morphisms=slices[prev_rank - 1],
-                    #         morphisms_rank=prev_rank - 1,
-                    #         string=string,
-                    #         mapped_nodes=mapped_nodes)
-
-                    if _source_node_id is None:
-                        print("Cannot find source node for {}!".format(_node_id))
+                for string_name in m.domain.names:
+                    # handles a codomain string that is the same as another morphism's in that slice, the first
+                    # port not wired yet is used
+                    source_col = Diagram._find_morphism_with_string(ports=ports, string_name=string_name)
+
+                    if source_col is None:
+                        print("Cannot find source node for {}!".format(graph.node_id(node)))
                         continue
 
-                    _source_node = nodes[_source_node_id]
-
-                    if _source_node["type"] == "IdentityMorphism":
-                        mapped_nodes.append(_source_node_id)
-                    elif _source_node["type"] == "NamedMorphism":
-                        # handle when morphism has a codomain string that is the same as another morphism in that slice
-                        _node_id_with_index = "{}_({})".format(_source_node_id, _mapped_string_ind)
-                        mapped_nodes.append(_node_id_with_index)
-
-                    _target_node = _node_id
-                    _edge_id = "[{}]*[{}]_{}".format(_source_node_id, _target_node, string.domain.name)
-                    _name = string.domain.name
-
-                    if type(m).__name__ == "IdentityMorphism" and _source_node["type"] == "NamedMorphism":
-                        source_position = Position(x=_position["x"], y=rank - 1)._asdict()  # use current x position
-                        target_position = Position(x=_position["x"], y=rank)._asdict()  # use own x_position
-                    elif type(m).__name__ == "NamedMorphism" and _source_node["type"] == "IdentityMorphism":
-                        source_position = Position(x=_source_node["position"]["x"],
-                                                   y=rank - 1)._asdict()  # use current x position
-                        target_position = Position(x=_source_node["position"]["x"],
-                                                   y=rank)._asdict()  # use own x_position
+                    source = previous_nodes[source_col]
+                    source_x = graph.node_x[source]
+                    if _type == "IdentityMorphism" and graph.kind(source) == "NamedMorphism":
+                        source_x = target_x = x_pos  # use own x position
+                    elif _type == "NamedMorphism" and graph.kind(source) == "IdentityMorphism":
+                        target_x = source_x  # use the x position of the string
                     else:
-                        source_position = Position(x=_source_node["position"]["x"], y=rank - 1)._asdict()
-                        target_position = Position(x=_position["x"], y=rank)._asdict()  # use own x_position
+                        target_x = x_pos
+
+                    graph.add_edge(source=source, target=node, name=string_name, source_x=source_x, target_x=target_x)
+
+            previous_nodes = current_nodes
+            ports = Diagram._index_ports(slice)
+        graph.rows = first_rank + len(slices)
+        return graph
 
-                    edge = Edge(id=_edge_id, source_node=_source_node_id, target_node=_target_node, name=_name,
-                                target_position=target_position, source_position=source_position)._asdict()
-                    edges[_edge_id] = edge
+    @staticmethod
+    def to_graph_from_slices(slices: list, padding: float = 0.5, offset: float = 0):
+        # dict views of the graph: nodes, edges and size
+        graph = Diagram.graph_from_slices(slices=slices, padding=padding, offset=offset)
+        return graph.nodes, graph.edges, graph.size
+
+    @staticmethod
+    def iter_graph(slices, padding: float = 0.5, offset: float = 0):
+        # One graph per slice, with the nodes of the slice above it, the nodes of the slice and the edges between
+        # them, ranks counted from the first slice. Only two rows are held at a time, `slices` can be a generator.
+        graph, above = DiagramGraph(padding=padding, offset=offset), None
+        for slice in slices:
+            graph = Diagram.graph_from_slices([slice], graph=graph.tail(), above=above)
+            yield graph
+            above = slice
 
-            previous_slice = slice
-            size = (max_row, max_col + 1)
-        return nodes, edges, size
+    @staticmethod
+    def iter_vis_from_slices(slices, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
+        # cytoscape elements row by row, the nodes of a row and then the edges into it. The same elements as
+        # to_vis_from_graph, which has all nodes before all edges.
+        colormap = Colors() if color_nodes else None
+        pending = None  # the last row with nodes is held back until it is known to be the last one
+
+        def elements(graph: DiagramGraph, max_rank: int or None):
+            for i in range(*graph.row_range(graph.rows - 1)):
+                yield graph.node_element(i, scale=scale, label_strings=label_strings, colormap=colormap,
+                                         max_rank=max_rank)
+            for j in range(graph.edge_count()):
+                yield graph.edge_element(j, scale=scale)
+
+        for graph in Diagram.iter_graph(slices):
+            start, stop = graph.row_range(graph.rows - 1)
+            if start == stop:
+                continue
+            if pending is not None:
+                yield from elements(pending, max_rank=None)
+            pending = graph
+        if pending is not None:
+            yield from elements(pending, max_rank=pending.rows - 1)
+
+    def iter_vis(self, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
+        return Diagram.iter_vis_from_slices(self.slices(), scale=scale, label_strings=label_strings,
+                                            color_nodes=color_nodes)
+
+    def write_vis(self, out, scale: int = 100, label_strings: bool = True, color_nodes: bool = False) -> int:
+        # streams the elements of iter_vis as a JSON array to a file name or a file object, returns the bytes written
+        elements = self.iter_vis(scale=scale, label_strings=label_strings, color_nodes=color_nodes)
+        if isinstance(out, str):
+            return JsonStream.dump(elements, out)
+        return JsonStream.write(elements, out)
+
+    def graph(self) -> DiagramGraph:
+        return Diagram.graph_from_slices(slices=self.slices())
 
     def as_graph(self):
-        slices = self.slices()
-        nodes, edges, size = self.to_graph_from_slices(slices=slices)
-        return nodes, edges, size
-
-    @staticmethod
-    def _build_node_colormap(nodes):
-        # import random
-        # r = lambda: str(random.randint(0, 255))
-        # color = "rgb({}, {}, {})".format(r(), r(), r())
-        # rgb = [[x, y, z] for x in range(256) for y in range(256) for z in range(256)]
-        # import matplotlib.pyplot as plt
-        from colorhash import ColorHash
-        node_names = [n["name"] for _, n in nodes.items() if n["type"] == "IdentityMorphism"]
-        uniq_node_names = set(node_names)
-        # color_func = plt.cm.get_cmap("tab20b", len(uniq_node_names))
-        # colors = ["rgb({}, {}, {})".format(color_func(i)[0] * 255,
-        #                                    color_func(i)[1] * 255,
-        #                                    color_func(i)[2] * 255)
-        #           for i, _ in enumerate(uniq_node_names)]
-        colors = ["rgb({}, {}, {})".format(ColorHash(x).rgb[0],
-                                           ColorHash(x).rgb[1],
-                                           ColorHash(x).rgb[2])
-                  for i, x in enumerate(uniq_node_names)]
-        colormap = dict(zip(uniq_node_names, colors))
-        return colormap
-
-    @staticmethod
-    def to_vis_from_graph(nodes: dict, edges: dict, filename: str or None, scale: int, label_strings: bool = True,
-                          color_nodes: bool = False):
-
-        colormap = Diagram._build_node_colormap(nodes)
-
-        cyto = []
-        max_y_position = max([n["position"]["y"] for _, n in nodes.items()])
-
-        for _, node in nodes.items():
-            c = dict()
-            if node["type"] == "NamedMorphism" and "\u03C4" in node["name"]:
-                node["shape"] = "round-rectangle"
-                node["opacity"] = 1
-                node["label"] = "\u03C4"
-                node["height"] = scale / 4
-                node["width"] = node["width"] * scale
-                node["color"] = "white"
-            elif node["type"] == "NamedMorphism":
-                node["shape"] = "round-rectangle"
-                node["opacity"] = 1
-                node["label"] = node["name"]
-                node["height"] = scale / 2
-                node["width"] = node["width"] * scale
-                node["color"] = "#dcdcdc"
-            elif node["type"] == "IdentityMorphism" and node["name"] == "[]":
-                # node["label"] = ""
-                node["height"] = 0
-                node["width"] = 0
-                node["opacity"] = 0
-            elif node["type"] == "IdentityMorphism":
-                if label_strings or node["position"]["y"] == 0 or node["position"]["y"] == max_y_position:
-                    node["label"] = node["name"]
-                    node["shape"] = "ellipse"
-                    node["opacity"] = 1
-                    node["height"] = scale / 4
-                    node["width"] = scale / 4
-                else:
-                    # node["label"] = node.pop("name")
-                    node["shape"] = "ellipse"
-                    node["opacity"] = 1
-                    node["height"] = 0.5
-                    node["width"] = 0.5
-
-                # import random
-                # r = lambda: str(random.randint(0,255))
-                # node["color"] = "rgb({}, {}, {})".format(r(),r(),r())
-
-                if color_nodes:
-                    node["color"] = colormap[node["name"]]
-                else:
-                    node["color"] = "#dcdcdc"
-            pos = {key: val * scale for key, val in node["position"].items()}
-            c["data"] = node
-            c["position"] = pos
-            c["group"] = "nodes"
-            cyto.append(c)
-
-        for _, edge in edges.items():
-            c = dict()
-            target_center = nodes[edge["target_node"]]["position"]["x"]
-            source_center = nodes[edge["source_node"]]["position"]["x"]
-            edge["source"] = edge.pop("source_node")
-            edge["target"] = edge.pop("target_node")
-            edge["label"] = edge.pop("name")
-            edge["target_position"] = "{} {}".format((edge["target_position"]["x"] - target_center) * scale, "-50%")
-            edge["source_position"] = "{} {}".format((edge["source_position"]["x"] - source_center) * scale, "50%")
-            c["data"] = edge
-            c["group"] = "edges"
-            cyto.append(c)
-
-        cyto_dump = json.dumps(cyto)
+        graph = self.graph()
+        return graph.nodes, graph.edges, graph.size
+
+    @staticmethod
+    def to_vis_from_graph(nodes: Mapping, edges: Mapping, filename: str or None, scale: int,
+                          label_strings: bool = True, color_nodes: bool = False):
+        # nodes and edges are the views returned by as_graph, the elements are built from the graph behind them.
+        # Plain {id: dict} nodes and edges laid out like the views are turned into a graph first.
+        graph = Diagram._graph_of_(nodes, edges)
+        cyto = graph.to_vis(scale=scale, label_strings=label_strings, color_nodes=color_nodes)
         if filename is not None:
-            with open(filename, "w") as outfile:
-                json.dump(json.loads(cyto_dump), outfile)
+            JsonStream.dump(cyto, filename)
         return cyto
 
+    @staticmethod
+    def _graph_of_(nodes: Mapping, edges: Mapping or None = None) -> DiagramGraph:
+        if isinstance(nodes, NodeView):
+            return nodes.graph
+        return DiagramGraph.from_dicts(nodes, edges)
+
     def to_vis(self, filename: str or None, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
         # tailored to cytoscape for now
-        nodes, edges, _ = self.as_graph()
-        return self.to_vis_from_graph(nodes=nodes, edges=edges, filename=filename, scale=scale,
-                                      label_strings=label_strings, color_nodes=color_nodes)
+        graph = self.graph()
+        return Diagram.to_vis_from_graph(nodes=graph.nodes, edges=graph.edges, filename=filename, scale=scale,
+                                         label_strings=label_strings, color_nodes=color_nodes)
 
-    def to_array(self):
-        nodes, _, size = self.as_graph()
-        return Diagram.graph_to_array(nodes=nodes, size=size)
+    def to_array(self, sparse: bool = False):
+        return self.graph().to_array(sparse=sparse)
 
     @staticmethod
-    def graph_to_array(nodes: dict, size: tuple):
-        myarray = np.zeros(size)
-        for _, node in nodes.items():
-            name = node["name"]
-            value = abs(hash(name)) % (10 ** 8)  # hash function to convert name to integer
-            row, col = node["index_position"]["y"], node["index_position"]["x"]
-
-            counter = list(range(int(node["width"] if node["width"] > 1 else node["width"])))
-            while counter:
-                shift = counter.pop(0)
-                myarray[row][col + shift] = value
-        return myarray.astype('uint8')
+    def graph_to_array(nodes: Mapping, size: tuple or None = None, sparse: bool = False):
+        # `nodes` as for to_vis_from_graph, without a `size` it follows from the graph
+        return Diagram._graph_of_(nodes).to_array(sparse=sparse, size=size)
 
     def to_json(self):
         return json.dumps(self.slices(), default=MonoidalCategory.json_encoder)
@@ -314,24 +214,33 @@ class Diagram:
 
     @staticmethod
     def asymm_diff(base: list, elements: list):
+        # multiset difference `elements - base`, in the order of `elements`
+        return [el for el, _ in Diagram._diff_with_index_(base=base, elements=elements)]
+
+    @staticmethod
+    def _diff_with_index_(base: list, elements: list) -> list:
+        # asymm_diff as (element, index of the first occurrence of its wire in `elements`) pairs, in one pass
+        remaining = collections.Counter(map(WireAlphabet.wire_name, base))
+        first_index = dict()
         diff = []
-        base_copy = base.copy()  # to not overwrite in place
-        for el in elements:
-            if el in base_copy:
-                base_copy.remove(el)
+        for i, el in enumerate(elements):
+            wire = WireAlphabet.wire_name(el)
+            ind = first_index.setdefault(wire, i)
+            if remaining[wire] > 0:
+                remaining[wire] -= 1
             else:
-                diff.append(el)
+                diff.append((el, ind))
         return diff
 
     @staticmethod
-    def make_strings(objects: List[Object or MonoidalObject]):
+    def make_strings(objects: List[str or MonoidalObject]):
         strings = []
         for el in objects:
-            if isinstance(el, Object):
+            if atom_name(el) is not None:
                 el = MonoidalObject(el)  # make all strings based on MonoidalObjects
                 strings.append(IdentityMorphism(el))
             elif isinstance(el, MonoidalObject):
-                for o in el.objects:
+                for o in el.tuple_view:
                     o = MonoidalObject(o)  # make all strings based on MonoidalObjects
                     strings.append(IdentityMorphism(o))
             else:
@@ -367,11 +276,8 @@ class Diagram:
         # [(E, False)]  "add E to the right of f"
 
         yarn_pattern = []
-        diff = Diagram.asymm_diff(base=cloth, elements=yarn)
-        for d in diff:
+        for d, ind_bottom in Diagram._diff_with_index_(base=cloth, elements=yarn):
             # bottom: [A B (E) C] => 2
-            ind_bottom = yarn.index(d)
-
             if Diagram._add_to_left_side_(index_to_add=ind_bottom, target_list_length=len(cloth)):
                 yarn_pattern.append((d, True))  # True means add to left-side
             else:
@@ -387,125 +293,102 @@ class Diagram:
         # top:      [A B C D E]
         # bottom:   [A B E C D]
 
-        if in_place:
-            cloth_new = cloth
-        else:
-            cloth_new = cloth.copy()
-
-        diff = Diagram.asymm_diff(base=cloth_new, elements=yarn)
-        for d in diff:
+        left, right = [], []  # left is built back to front
+        for d, ind_bottom in Diagram._diff_with_index_(base=cloth, elements=yarn):
             # bottom: [A B (E) C] => 2
-            ind_bottom = yarn.index(d)
-
-            if Diagram._add_to_left_side_(index_to_add=ind_bottom, target_list_length=len(cloth_new)):
-                cloth_new.insert(0, d)  # add to left
+            length = len(left) + len(cloth) + len(right)
+            if Diagram._add_to_left_side_(index_to_add=ind_bottom, target_list_length=length):
+                left.append(d)  # add to left
             else:
-                cloth_new.insert(len(cloth_new), d)  # default: add to right
-        return cloth_new
+                right.append(d)  # default: add to right
 
-    @staticmethod
-    def _swap_(lst: list, pos1: int, pos2: int):
-        lst[pos1], lst[pos2] = lst[pos2], lst[pos1]
-        return lst
+        left.reverse()
+        if in_place:
+            cloth[:0] = left
+            cloth.extend(right)
+            return cloth
+        return left + cloth + right
 
     @staticmethod
-    def _make_unique_(x: list):
-        x_counter = collections.Counter(x)
-        x_counter_list = dict()
-        for k, v in x_counter.items():
-            x_counter_list[k] = list(range(v))
+    def _tensor_strings_(diagram, pattern: list):
+        # tensor the strings of a yarn pattern onto `diagram` in one go, strings added to the left later end up
+        # further left
+        if not pattern:
+            return diagram
+        left = [m for m, left_side in reversed(pattern) if left_side]
+        right = [m for m, left_side in pattern if not left_side]
+        return Diagram(MonoidalMorphism(*left, diagram.morphism, *right))
 
-        x_uniq = []
-        x_uniq_map = dict()
-        for o in x:
-            ind = x_counter_list[o][0]
-            del x_counter_list[o][0]
-            label = "{}_{}".format(o.name, ind)
-            x_uniq.append(label)
-            x_uniq_map[label] = o
-        return x_uniq, x_uniq_map
+    @staticmethod
+    def compute_permutation(a: list, b: list) -> Permutation:
+        # how the wires of `a` are reordered into `b`, without spelling out the swaps
+        return Permutation.between(a, b)
 
     @staticmethod
     def compute_swaps(a: list, b: list):
-        # Apply swaps to `a` to reach `b`
-
-        if len(a) != len(b):
-            raise ValueError("Both lists must be equal lengths!")
-
-        if collections.Counter(a) != collections.Counter(b):
-            raise ValueError("Both lists must contain the same values!")
-
-        a_uniq, a_uniq_map = Diagram._make_unique_(x=a)
-        b_uniq, b_uniq_map = Diagram._make_unique_(x=b)
-
-        swaps = []
-        new_a = a_uniq.copy()  # fix b
-        elements = a_uniq
-        while elements:
-            for el in elements:
-                index_a = new_a.index(el)
-                value_b = b_uniq[index_a]
-                if el == value_b:
-                    elements.remove(el)
-                    break  # if they are in the same position, move on
-                else:
-                    index_b = b_uniq.index(el)
-                    compare_indices = index_a - index_b
-                    if compare_indices < 0:  # if negative, means index_a is to the left index_b
-                        delta = 1  # move to the right
-                        swaps.append((a_uniq_map[el], a_uniq_map[new_a[index_a + delta]]))  # swaps are (left, right)
-                    elif compare_indices > 0:  # if positive, means index_a is the the right of index_b
-                        delta = -1  # move to the left
-                        swaps.append((a_uniq_map[new_a[index_a + delta]], a_uniq_map[el]))  # swaps are (left, right)
-                    else:  # which should be never
-                        delta = 0
-                    new_a = Diagram._swap_(new_a, index_a, index_a + delta)  # only change list a
-        return swaps
-
-    @staticmethod
-    def add_braids(from_diagram, to_diagram) -> list:
-        # find braids
-        top = from_diagram.codomain.objects
-        bottom = to_diagram.domain.objects
+        # Apply swaps to `a` to reach `b`, as (left, right) pairs. The word is the shortest one, every pair of wires
+        # crosses at most once.
+        return Diagram.compute_permutation(a, b).swaps(a)
 
+    @staticmethod
+    def braid_positions(top: tuple, bottom: tuple, pack_braids: bool = False) -> list:
+        # The braids taking the wires of `top` into the order of `bottom`, as layers of positions: k stands for a
+        # swap of the wires at positions k and k + 1. One braid per layer, or swaps on disjoint wires sharing a
+        # layer (odd-even transposition sort).
         try:
-            swaps = Diagram.compute_swaps(top, bottom)
+            permutation = Diagram.compute_permutation(top, bottom)
         except ValueError:
             raise ValueError("Can not compute swaps for composing diagrams")
 
-        braids = []
-        for a, b in swaps:
-            braids.append(SymmetricMonoidalCategory.swap(a, b))
-        braids = SymmetricMonoidalCategory.simplify(braids)
-
-        # insert monoidal morphisms with braid in between top and bottom diagram
-        diagram_with_braids = [from_diagram]
-        objects_above = from_diagram.morphism.codomain.objects
-        for braid in braids:
-            # scan codomain objects in pairs
-            braid_ind = -1
-            for obj_l, obj_r in zip(objects_above, objects_above[1:]):
-                braid_ind += 1
-                if obj_l == braid.domain.objects[0] and obj_r == braid.domain.objects[1]:  # if object pairs match braid
-                    break
+        if pack_braids:
+            return permutation.layers()
+        return [[k] for k in permutation.transpositions()]
 
+    @staticmethod
+    def braid_layers(top: tuple, layers: list, morphisms: dict or None = None) -> list:
+        # One Diagram per layer of braid positions below the wires `top`, braids are placed by position so repeated
+        # wires can not be mixed up. `morphisms` caches the identities and swaps by wire names, pass the same dict
+        # to share them between boundaries. Every layer is a MonoidalMorphism.from_parts, the wires are known.
+        if morphisms is None:
+            morphisms = dict()
+        diagrams = []
+        objects_above = list(top)
+        identities = [Diagram._identity_(morphisms, name) for name in objects_above]
+        domain = MonoidalObject.from_names(tuple(top))
+        for layer in layers:
             tensor = []
-            for curr_ind, obj in enumerate(objects_above):
-                if braid_ind == curr_ind:
-                    tensor.append(braid)
-                elif braid_ind + 1 == curr_ind:
-                    continue
-                else:
-                    tensor.append(IdentityMorphism(obj))
+            start = 0
+            for k in layer:
+                tensor.extend(identities[start:k])
+                x, y = objects_above[k], objects_above[k + 1]
+                swap = morphisms.get((x, y))
+                if swap is None:
+                    swap = morphisms[(x, y)] = SymmetricMonoidalCategory.braid(x, y)
+                tensor.append(swap)
+                objects_above[k], objects_above[k + 1] = y, x
+                identities[k], identities[k + 1] = identities[k + 1], identities[k]
+                start = k + 2
+            tensor.extend(identities[start:])
+            codomain = MonoidalObject.from_names(tuple(objects_above))
+            diagrams.append(Diagram(MonoidalMorphism.from_parts(tuple(tensor), domain, codomain)))
+            domain = codomain
+        return diagrams
 
-            new_diagram = Diagram(MonoidalMorphism(*tensor))
-            diagram_with_braids.append(new_diagram)
-            objects_above = new_diagram.morphism.codomain.objects
+    @staticmethod
+    def _identity_(morphisms: dict, name: str) -> IdentityMorphism:
+        identity = morphisms.get(name)
+        if identity is None:
+            identity = morphisms[name] = IdentityMorphism(name)
+        return identity
 
-        diagram_with_braids.append(to_diagram)
-        return diagram_with_braids
+    @staticmethod
+    def add_braids(from_diagram, to_diagram, pack_braids: bool = False) -> list:
+        # insert monoidal morphisms with braids in between top and bottom diagram
+        top = from_diagram.codomain.tuple_view
+        layers = Diagram.braid_positions(top, to_diagram.domain.tuple_view, pack_braids=pack_braids)
+        return [from_diagram, *Diagram.braid_layers(top, layers), to_diagram]
 
-    def compose(self, other):
+    def compose(self, other, pack_braids: bool = False):
         # compose := self * other
         # compose(self, other) = self -> other
         # self first, then other
@@ -518,34 +401,69 @@ class Diagram:
             cloth_strings = Diagram.make_strings(self.codomain)
             yarn_strings = Diagram.make_strings(other.domain)
             pattern = Diagram.yarn_pattern(cloth=cloth_strings, yarn=yarn_strings)
-            for (m, left_side) in pattern:
-                if left_side:
-                    new_self = Diagram(MonoidalMorphism(m, new_self.morphism))
-                else:
-                    new_self = Diagram(MonoidalMorphism(new_self.morphism, m))
+            new_self = Diagram._tensor_strings_(new_self, pattern)
 
             # weave self-down next
             cloth_strings = Diagram.make_strings(other.domain)
             yarn_strings = Diagram.make_strings(self.codomain)
             pattern = Diagram.yarn_pattern(cloth=cloth_strings, yarn=yarn_strings)
-            for (m, left_side) in pattern:
-                if left_side:
-                    new_other = Diagram(MonoidalMorphism(m, new_other.morphism))
-                else:
-                    new_other = Diagram(MonoidalMorphism(new_other.morphism, m))
+            new_other = Diagram._tensor_strings_(new_other, pattern)
 
-            morphism_with_braids = Diagram.add_braids(from_diagram=new_self, to_diagram=new_other)
+            morphism_with_braids = Diagram.add_braids(from_diagram=new_self, to_diagram=new_other,
+                                                      pack_braids=pack_braids)
             return StringDiagram(morphism_with_braids)
         else:
             raise TypeError("Can only compose Diagram with other Diagrams!")
 
     def slices(self):
-        return [Diagram.make_strings(self.domain.objects),
+        return [Diagram.make_strings(self.domain.tuple_view),
                 self.morphism.morphisms if isinstance(self.morphism, MonoidalMorphism) else [self.morphism],
-                Diagram.make_strings(self.codomain.objects)]
+                Diagram.make_strings(self.codomain.tuple_view)]
 
-    def tensor(self):
-        raise NotImplementedError
+    @staticmethod
+    def _hash_strings_(h, tag: bytes, strings):
+        h.update(tag)
+        for string in strings:
+            data = string.encode("utf-8")
+            h.update(len(data).to_bytes(4, "little"))
+            h.update(data)
+
+    def digest(self) -> bytes:
+        # Structural digest of the layer: every box with its name, domain and codomain, and every string, left to
+        # right. Labels given to the Diagram itself are not part of it, and id_{a @ b} is the same as id_{a} @ id_{b}.
+        # blake2b, so it is the same in every process.
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for m in (self.morphism.morphisms if isinstance(self.morphism, MonoidalMorphism) else [self.morphism]):
+                if isinstance(m, IdentityMorphism):
+                    for name in m.domain.names:
+                        Diagram._hash_strings_(h, b"I", [name])
+                else:
+                    Diagram._hash_strings_(h, b"N", [m.name])
+                    Diagram._hash_strings_(h, b"D", m.domain.names)
+                    Diagram._hash_strings_(h, b"C", m.codomain.names)
+            self._digest = h.digest()
+        return self._digest
+
+    @property
+    def fingerprint(self) -> str:
+        return self.digest().hex()
+
+    def __eq__(self, other):
+        if not isinstance(other, Diagram):
+            return NotImplemented
+        return self is other or self.digest() == other.digest()
+
+    def __hash__(self):
+        return hash(self.digest())
+
+    def tensor(self, other):
+        # self @ other, side by side
+        if isinstance(other, Diagram):
+            return Diagram(MonoidalMorphism(self.morphism, other.morphism))
+        if isinstance(other, StringDiagram):
+            return StringDiagram._from_woven([self]).tensor(other)
+        raise TypeError("Can only tensor Diagram with Diagram or StringDiagram!")
 
     def draw(self):
         raise NotImplementedError
@@ -553,6 +471,9 @@ class Diagram:
     def __mul__(self, other):
         return self.compose(other)
 
+    def __matmul__(self, other):
+        return self.tensor(other)
+
     def __str__(self):
         return self.name
 
@@ -564,6 +485,8 @@ class Diagram:
 
 
 class StringDiagram:
+    FORMAT_VERSION = 1  # of the files written by save
+
     def __init__(self, diagrams: List[Diagram], name: str or None = None):
 
         morphisms = [d.morphism for d in diagrams]
@@ -572,10 +495,62 @@ class StringDiagram:
                 raise ValueError("Cannot compose {} with {}!".format(current.name, following.name))
 
         self._diagrams = tuple(diagrams)
-        if name is None:
-            self.name = " * ".join([d.name for d in self.diagrams])
-        else:
-            self.name = name
+        self._name = name
+        self._chain = []
+        self._graph = None
+        self._graph_base = None  # (graph of a diagram with the same leading layers, number of shared layers)
+
+    @staticmethod
+    def _from_woven(diagrams: List[Diagram], prefix=None):
+        # weaving only ever produces composable chains, so skip re-checking every pair
+        # `prefix` is a StringDiagram whose leading layers are shared, their digests and graph rows are reused
+        sd = StringDiagram.__new__(StringDiagram)
+        sd._diagrams = tuple(diagrams)
+        sd._name = None
+        sd._chain = []
+        sd._graph = None
+        sd._graph_base = None
+        if prefix is not None and (prefix._chain or prefix._graph is not None):
+            shared = 0
+            for a, b in zip(prefix._diagrams, sd._diagrams):
+                if a is not b:
+                    break
+                shared += 1
+            sd._chain = prefix._chain[:shared]
+            if prefix._graph is not None and shared:
+                sd._graph_base = (prefix._graph, shared)
+        return sd
+
+    def digest(self) -> bytes:
+        # Chained digest over the layers from the top: digest k covers layers 0..k, so composing only has to
+        # hash the layers that changed. Names given to the StringDiagram are not part of it.
+        for d in self._diagrams[len(self._chain):]:
+            h = hashlib.blake2b(self._chain[-1] if self._chain else b"", digest_size=16)
+            h.update(d.digest())
+            self._chain.append(h.digest())
+        return self._chain[-1]
+
+    @property
+    def fingerprint(self) -> str:
+        return self.digest().hex()
+
+    def __eq__(self, other):
+        if not isinstance(other, StringDiagram):
+            return NotImplemented
+        return self is other or (len(self._diagrams) == len(other._diagrams) and self.digest() == other.digest())
+
+    def __hash__(self):
+        return hash(self.digest())
+
+    @property
+    def name(self):
+        if self._name is None:
+            return self.linear_syntax
+        return self._name
+
+    @name.setter
+    def name(self, name: str or None):
+        self._name = name
 
     @property
     def diagrams(self):
@@ -583,32 +558,167 @@ class StringDiagram:
 
     @property
     def linear_syntax(self):
-        return " * ".join([d.name for d in self.diagrams])
+        return " * ".join([d.name for d in self._diagrams])
 
     @property
     def morphisms(self):
-        return [d.morphism for d in self.diagrams]
+        return [d.morphism for d in self._diagrams]
 
     @property
     def domain(self):
-        return self.diagrams[0].domain
+        return self._diagrams[0].domain
 
     @property
     def codomain(self):
-        return self.diagrams[-1].codomain
+        return self._diagrams[-1].codomain
 
     @staticmethod
-    def weave(diagrams: list):
+    def weave(diagrams: list, pack_braids: bool = False):
         new_diagrams = []
         top_d = diagrams.pop(0)
         for bottom_d in diagrams:
-            merged_sd = top_d * bottom_d
-            new_diagrams = new_diagrams + merged_sd.diagrams
+            merged_sd = top_d.compose(bottom_d, pack_braids=pack_braids)
+            new_diagrams.extend(merged_sd.diagrams)
             top_d = new_diagrams.pop(-1)
         new_diagrams.append(top_d)
         return new_diagrams
 
-    def compose(self, other):
+    @staticmethod
+    def _weave_down(diagrams: list, boundary: int, pack_braids: bool = False) -> list:
+        # Same as weave, for a list that is already woven above and below `boundary`. Dangling strings
+        # only travel down until they reach a pair that already composes, the rest of the chain is untouched.
+        woven = diagrams[:boundary]
+        top_d = diagrams[boundary]
+        for i in range(boundary + 1, len(diagrams)):
+            bottom_d = diagrams[i]
+            if top_d.codomain == bottom_d.domain:
+                return woven + [top_d] + diagrams[i:]
+            woven.extend(top_d.compose(bottom_d, pack_braids=pack_braids).diagrams)
+            top_d = woven.pop(-1)
+        woven.append(top_d)
+        return woven
+
+    @staticmethod
+    def _weave_up(diagrams: list, boundary: int, pack_braids: bool = False) -> list:
+        # Weave from the bottom up on inverted diagrams, like compose does for the whole chain. Below
+        # `boundary` every pair is visited. Above it, the first pair that composes ends the pass since
+        # nothing higher up changed.
+        woven = []  # inverted, bottom first
+        bottom_d = diagrams[-1].inverse()
+        for i in range(len(diagrams) - 2, -1, -1):
+            top_d = diagrams[i]
+            if i < boundary and top_d.codomain == bottom_d.codomain:  # bottom_d is inverted
+                woven.append(bottom_d)
+                return diagrams[:i + 1] + [d.inverse() for d in reversed(woven)]
+            woven.extend(bottom_d.compose(top_d.inverse(), pack_braids=pack_braids).diagrams)
+            bottom_d = woven.pop(-1)
+        woven.append(bottom_d)
+        return [d.inverse() for d in reversed(woven)]
+
+    @staticmethod
+    def compose_many(diagrams: list, pack_braids: bool = False):
+        # The algorithm from the README over a whole sequence at once:
+        # 1. backward pass, weave the input strings of every diagram up through the diagrams above it
+        # 2. forward pass, weave the output strings of every diagram down through the diagrams below it
+        # 3. add braids between neighbours whose strings are in a different order
+        # Strings are only tracked by name until the end, so weaving is linear in the total number of strings.
+        woven = StringDiagram._weave_many(diagrams)
+
+        # 3. add braids
+        return StringDiagram._from_woven(StringDiagram._braid_many(woven, pack_braids=pack_braids))
+
+    @staticmethod
+    def _weave_many(diagrams: list) -> list:
+        # steps 1 and 2 of compose_many, the diagrams with the strings passing by them added on either side
+        layers = []
+        for d in diagrams:
+            if isinstance(d, StringDiagram):
+                layers.extend(d._diagrams)
+            elif isinstance(d, Diagram):
+                layers.append(d)
+            else:
+                raise TypeError("Can only compose Diagrams and StringDiagrams!")
+        if not layers:
+            raise ValueError("Need at least one diagram to compose!")
+
+        left = [[] for _ in layers]  # strings added on the left, the last one added ends up leftmost
+        right = [[] for _ in layers]
+
+        def strings(i: int, objects: MonoidalObject) -> list:
+            return left[i][::-1] + list(objects.names) + right[i]
+
+        def add_strings(i: int, cloth: list, yarn: list):
+            for string, left_side in Diagram.yarn_pattern(cloth=cloth, yarn=yarn):
+                (left[i] if left_side else right[i]).append(string)
+
+        # 1. backward pass
+        for i in range(len(layers) - 2, -1, -1):
+            add_strings(i, cloth=strings(i, layers[i].codomain), yarn=strings(i + 1, layers[i + 1].domain))
+
+        # 2. forward pass
+        for i in range(len(layers) - 1):
+            add_strings(i + 1, cloth=strings(i + 1, layers[i + 1].domain), yarn=strings(i, layers[i].codomain))
+
+        woven = []
+        for i, d in enumerate(layers):
+            if left[i] or right[i]:
+                d = Diagram(MonoidalMorphism(*[IdentityMorphism(MonoidalObject(o)) for o in reversed(left[i])],
+                                             d.morphism,
+                                             *[IdentityMorphism(MonoidalObject(o)) for o in right[i]]))
+            woven.append(d)
+        return woven
+
+    @staticmethod
+    def _braid_many(woven: list, pack_braids: bool = False, positions=None) -> list:
+        # step 3 of compose_many, braids between neighbours of `woven` whose strings are in a different order.
+        # `positions` yields the braid positions of those boundaries in order, if they are worked out elsewhere.
+        # The identities and swaps are shared by all braid layers.
+        morphisms = dict()
+        boundaries = iter(positions) if positions is not None else None
+        new_diagrams = [woven[0]]
+        for above, d in zip(woven, woven[1:]):
+            if above.codomain != d.domain:
+                top = above.codomain.tuple_view
+                if boundaries is None:
+                    layers = Diagram.braid_positions(top, d.domain.tuple_view, pack_braids=pack_braids)
+                else:
+                    layers = next(boundaries)
+                new_diagrams.extend(Diagram.braid_layers(top, layers, morphisms))
+            new_diagrams.append(d)
+        return new_diagrams
+
+    @staticmethod
+    def _braid_positions_many(pack_braids: bool, boundaries: list) -> list:
+        # Diagram.braid_positions for a run of (top, bottom) wire names, run in the process pool
+        return [Diagram.braid_positions(top, bottom, pack_braids=pack_braids) for top, bottom in boundaries]
+
+    @staticmethod
+    def compose_parallel(diagrams: list, chunk_size: int = 256, max_workers: int or None = None,
+                         pack_braids: bool = False):
+        # compose_many with the braid positions worked out in separate processes. Strings are woven through the
+        # whole sequence first, which is linear in the number of strings. Runs of `chunk_size` boundaries that
+        # need braids are sent to a process pool as tuples of wire names and only the positions of the swaps come
+        # back, so nothing but names and ints is pickled. The braid layers are built here while the pool works on
+        # later runs. Weaving and building the layers stay in this process, so the most that can be saved is the
+        # time compose_many spends on permutations. With a single worker this is compose_many. The result is the
+        # same diagram as compose_many.
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive!")
+        woven = StringDiagram._weave_many(diagrams)
+        boundaries = [(above.codomain.tuple_view, d.domain.tuple_view)
+                      for above, d in zip(woven, woven[1:]) if above.codomain != d.domain]
+        if len(boundaries) <= chunk_size or (max_workers or os.cpu_count() or 1) < 2:
+            return StringDiagram._from_woven(StringDiagram._braid_many(woven, pack_braids=pack_braids))
+
+        chunks = [boundaries[start:start + chunk_size] for start in range(0, len(boundaries), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            positions = itertools.chain.from_iterable(
+                executor.map(partial(StringDiagram._braid_positions_many, pack_braids), chunks))
+            return StringDiagram._from_woven(StringDiagram._braid_many(woven, positions=positions))
+
+    def compose(self, other, pack_braids: bool = False):
+        # Appends `other` without re-weaving the whole chain: only the layers that the new dangling
+        # strings pass through are re-woven. The result is the same as weaving all diagrams down and up.
         if not isinstance(other, (Diagram, StringDiagram)):
             raise TypeError("Can only compose StringDiagram with Diagram or StringDiagram!")
 
@@ -617,51 +727,397 @@ class StringDiagram:
         else:
             other_diagrams = [other]
         self_diagrams = self.diagrams
+        boundary = len(self_diagrams) - 1  # last diagram of self
+
+        woven_down = StringDiagram._weave_down(diagrams=self_diagrams + other_diagrams, boundary=boundary,
+                                               pack_braids=pack_braids)
+        woven_up = StringDiagram._weave_up(diagrams=woven_down, boundary=boundary, pack_braids=pack_braids)
+        return StringDiagram._from_woven(woven_up, prefix=self)
+
+    def compact(self):
+        # Planar deformation: slide every box up past the layers it does not interact with (interchange law),
+        # so each box sits right below the last box it takes a string from, then drop layers that are only
+        # identities. Boxes are handled top to bottom, so the depth is the longest chain of dependent boxes.
+        # A box never slides past a box sitting in between its own input strings.
+        #
+        # Strings are numbered and followed from the box producing them to the box taking them. Sliding a box
+        # only changes how long its strings are, so every box goes straight to the layer below the boxes it
+        # depends on, and the layers are laid out once at the end. This is linear in the size of the diagram.
+        identities = dict()  # one identity per string name, shared by every layer
+
+        def identity(name: str) -> IdentityMorphism:
+            m = identities.get(name)
+            if m is None:
+                m = identities[name] = IdentityMorphism(MonoidalObject(name))
+            return m
+
+        names = list(self.domain.names)  # string -> name
+        producer = [None] * len(names)  # string -> box producing it, None for the domain
+        boxes = []  # [morphism, input strings, output strings, layer, string to the left if it has no inputs]
+        # string or None for the left edge -> layers of the boxes without outputs right of it, left to right
+        blocked = dict()
+        after = collections.defaultdict(list)  # (layer, string or None) or box -> boxes without inputs after it
+        changed = [0] * (len(self._diagrams) + 1)  # +1 where a run of changed layers starts, -1 after it ends
+
+        strings = list(range(len(names)))
+        for j, d in enumerate(self._diagrams):
+            left = []  # strings of layer j left of the morphism at hand, boxes that moved left theirs
+            below = []
+            # blocked[gap][:mark] is left of the strings taken in layer j, a box without inputs sliding up from
+            # here passes right of them. Earlier layers only count for their lowest box.
+            StringDiagram._settle_(blocked, None)
+            mark = 0
+            pos = 0
+            for m in (d.morphism.morphisms if isinstance(d.morphism, MonoidalMorphism) else [d.morphism]):
+                width = len(m.domain)
+                if isinstance(m, IdentityMorphism):
+                    left.extend(strings[pos:pos + width])
+                    below.extend(strings[pos:pos + width])
+                    StringDiagram._settle_(blocked, below[-1])
+                    mark = 0
+                    pos += width
+                    continue
 
-        to_be_woven = self_diagrams + other_diagrams
+                inputs = strings[pos:pos + width]
+                pos += width
+                outputs = list(range(len(names), len(names) + len(m.codomain)))
+                names.extend(m.codomain.names)
+                producer.extend(itertools.repeat(len(boxes), len(outputs)))
+                edge = left[-1] if left else None  # string left of the box above it
+                gap = below[-1] if below else None  # and below it
+                box = [m, inputs, outputs, j, None]
+                if inputs:
+                    # right below the boxes producing its inputs, and below boxes without outputs in between
+                    box[3] = max(boxes[producer[s]][3] + 1 if producer[s] is not None else 0 for s in inputs)
+                    inner = max((max(blocked.pop(s, (-1,))) for s in inputs[:-1]), default=-1)
+                    box[3] = max(box[3], inner + 1)
+                    right = max(blocked.pop(inputs[-1], (-1,)))
+                    if outputs:
+                        blocked[outputs[-1]] = [right]
+                    elif box[3] < j:
+                        blocked.setdefault(gap, []).append(max(inner, box[3], right))
+                    else:
+                        gaps = blocked.setdefault(gap, [])
+                        gaps.append(box[3])
+                        mark = len(gaps)
+                        gaps.append(right)
+                else:
+                    box[3], box[4], slot = StringDiagram._rise_(boxes, producer, j, edge)
+                    if slot is None:
+                        after[(j, edge)].append(len(boxes))
+                    else:
+                        after[slot].insert(0, len(boxes))  # goes in before what is already at the same place
+                    if outputs:
+                        # its outputs split the gap, the boxes left of the strings taken in this layer or left
+                        # behind in it stay on the left
+                        gaps = blocked.pop(gap, [])
+                        stay = gaps[:mark] + [layer for layer in gaps[mark:] if layer == j]
+                        if stay:
+                            blocked[gap] = stay
+                        blocked[outputs[-1]] = [max((layer for layer in gaps[mark:] if layer < j), default=-1)]
+                    else:
+                        blocked.setdefault(gap, []).append(box[3])
+                boxes.append(box)
 
-        # weave down
-        woven_down = StringDiagram.weave(diagrams=to_be_woven)  # weave down first
-        woven_down.reverse()  # flip
-        woven_down = [d.inverse() for d in woven_down]  # flip domain and codomains
+                if box[3] < j:
+                    changed[box[3]] += 1
+                    changed[j + 1] -= 1
+                    left.extend(outputs)
+                else:
+                    left.extend(inputs)
+                if outputs:
+                    below.extend(outputs)
+                    mark = 0
+            strings = below
+
+        # lay out the layers, every box is placed by its input strings and the ones without by `after`
+        first_input = {box[1][0]: b for b, box in enumerate(boxes) if box[1]}
+        busy = {box[3] for box in boxes}  # layers left with only identities pass the strings on as they are
+        new_diagrams = []
+        strings = list(range(len(self.domain)))
+        run = 0
+        for j, d in enumerate(self._diagrams):
+            run += changed[j]
+            if j not in busy:
+                continue
+            morphisms, below = [], []
+
+            def place(key):
+                stack = after.get(key, [])[::-1]
+                while stack:
+                    b = stack.pop()
+                    morphisms.append(boxes[b][0])
+                    below.extend(boxes[b][2])
+                    stack.extend(after.get(b, ())[::-1])  # boxes without inputs on its outputs come next
+
+            place((j, None))
+            pos = 0
+            while pos < len(strings):
+                s = strings[pos]
+                b = first_input.get(s)
+                if b is not None and boxes[b][3] == j:
+                    morphisms.append(boxes[b][0])
+                    below.extend(boxes[b][2])
+                    pos += len(boxes[b][1])
+                    s = boxes[b][1][-1]
+                else:
+                    morphisms.append(identity(names[s]))
+                    below.append(s)
+                    pos += 1
+                place((j, s))
+            strings = below
+
+            if not run:
+                new_diagrams.append(d)  # untouched, keep the diagram and its name
+            elif len(morphisms) == 1:
+                new_diagrams.append(Diagram(morphisms[0]))
+            else:
+                new_diagrams.append(Diagram(MonoidalMorphism(*morphisms)))
+        if not new_diagrams:  # only identities
+            new_diagrams.append(self._diagrams[0])
+        return StringDiagram._from_woven(new_diagrams, prefix=self)
 
-        # weave up
-        woven_up = StringDiagram.weave(diagrams=woven_down)  # weave up
-        woven_up.reverse()  # flip back
-        woven_up = [d.inverse() for d in woven_up]  # flip back domain and codomains
+    @staticmethod
+    def _settle_(blocked: dict, gap: int or None):
+        # a gap carried over from the layers above only matters for its lowest box
+        gaps = blocked.get(gap)
+        if gaps is not None and len(gaps) > 1:
+            blocked[gap] = [max(gaps)]
 
-        new_diagrams = woven_up
-        return StringDiagram(new_diagrams)
+    @staticmethod
+    def _rise_(boxes: list, producer: list, layer: int, edge: int or None) -> tuple:
+        # How far a box without inputs in `layer` slides up, right of the string `edge`. It stays right of the
+        # strings it passes, past a box whose last output is that string and onto the string left of the box.
+        # Between two outputs of one box it stops. Returns the layer, the string left of the box there and the
+        # place it went in at: (layer, string) right after the morphism taking the string, or a box without
+        # inputs. The place is None if the box did not move.
+        slot = None
+        while layer > 0:
+            if edge is None:
+                return 0, None, (0, None)
+            b = producer[edge]
+            above = boxes[b][3] if b is not None else -1
+            if above < layer - 1:
+                layer = above + 1  # the string passes the layers in between
+                slot = (layer, edge)
+                continue
+            box = boxes[b]
+            if box[2][-1] != edge:
+                break
+            layer = above
+            if box[1]:
+                edge = box[1][-1]
+                slot = (layer, edge)
+            else:
+                edge = box[4]
+                slot = b
+        return layer, edge, slot
 
     def as_morphism(self):
-        return CompositeMorphism(self.morphisms)
+        # the sympy CompositeMorphism
+        from sympy.categories import CompositeMorphism
+        return CompositeMorphism([m.to_sympy() for m in self.morphisms])
+
+    @staticmethod
+    def from_sympy(morphism, name: str or None = None):
+        from sympy.categories import CompositeMorphism
+        components = morphism.components if isinstance(morphism, CompositeMorphism) else [morphism]
+        return StringDiagram([Diagram(from_sympy(m)) for m in components], name=name)
 
     def to_json(self):
         return json.dumps(self.slices(), default=MonoidalCategory.json_encoder)
 
+    def graph(self) -> DiagramGraph:
+        # Built once and kept, it must not be changed. A diagram composed onto one that was drawn copies the rows of
+        # the layers they share, then lays out and wires only the layers after them.
+        if self._graph is None:
+            base, shared = self._graph_base if self._graph_base is not None else (None, 0)
+            if base is None:
+                graph = Diagram.graph_from_slices(slices=self.slices())
+            else:
+                slices = [s for d in self._diagrams[shared:] for s in d.slices()[1:]]
+                above = Diagram.make_strings(self._diagrams[shared - 1].codomain.tuple_view)
+                graph = Diagram.graph_from_slices(slices=slices, graph=base.copy(rows=1 + 2 * shared), above=above)
+            self._graph, self._graph_base = graph, None
+        return self._graph
+
     def as_graph(self):
-        slices = self.slices()
-        return Diagram.to_graph_from_slices(slices)
+        graph = self.graph()
+        return graph.nodes, graph.edges, graph.size
+
+    def iter_vis(self, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
+        # streamed layer by layer, nothing is kept, see Diagram.iter_vis_from_slices
+        return Diagram.iter_vis_from_slices(self.iter_slices(), scale=scale, label_strings=label_strings,
+                                            color_nodes=color_nodes)
+
+    def write_vis(self, out, scale: int = 100, label_strings: bool = True, color_nodes: bool = False) -> int:
+        return Diagram.write_vis(self, out, scale=scale, label_strings=label_strings, color_nodes=color_nodes)
 
     def to_vis(self, filename: str, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
-        nodes, edges, _ = self.as_graph()
-        return Diagram.to_vis_from_graph(nodes=nodes, edges=edges, filename=filename, scale=scale,
+        graph = self.graph()
+        return Diagram.to_vis_from_graph(nodes=graph.nodes, edges=graph.edges, filename=filename, scale=scale,
                                          label_strings=label_strings, color_nodes=color_nodes)
 
-    def to_array(self):
-        nodes, _, size = self.as_graph()
-        return Diagram.graph_to_array(nodes=nodes, size=size)
+    def to_array(self, sparse: bool = False):
+        return self.graph().to_array(sparse=sparse)
+
+    def iter_slices(self):
+        yield Diagram.make_strings(self.domain.tuple_view)
+        for d in self._diagrams:
+            yield from d.slices()[1:]  # remove domain slice for every diagram
 
     def slices(self):
-        slices = sum([d.slices()[1:] for d in self.diagrams], [])  # remove domain slice for every diagram
-        # slices = [m.morphisms if isinstance(m, MonoidalMorphism) else [m] for m in self.morphisms]
-        slices.insert(0, Diagram.make_strings(self.domain.objects))
-        # slices.append(Diagram.make_strings(self.codomain.objects))
-        return slices
+        return list(self.iter_slices())
+
+    def tensor(self, other):
+        # self @ other: both side by side, merged layer by layer. The shorter one carries on with identities on
+        # its codomain. Every layer is a Diagram of its own, the padded ones too, as the other side changes from
+        # layer to layer, but the padding is built once and a layer is put together from the flat morphisms and
+        # names of both sides instead of flattening its signature again.
+        if isinstance(other, StringDiagram):
+            other_diagrams = other._diagrams
+        elif isinstance(other, Diagram):
+            other_diagrams = (other,)
+        else:
+            raise TypeError("Can only tensor StringDiagram with Diagram or StringDiagram!")
+
+        depth = max(len(self._diagrams), len(other_diagrams))
+        left = [StringDiagram._parts_(d.morphism) for d in self._diagrams]
+        right = [StringDiagram._parts_(d.morphism) for d in other_diagrams]
+        if len(left) < depth:
+            left.extend([StringDiagram._padding_(self.codomain)] * (depth - len(left)))
+        if len(right) < depth:
+            right.extend([StringDiagram._padding_(other_diagrams[-1].codomain)] * (depth - len(right)))
+        return StringDiagram._from_woven([Diagram(MonoidalMorphism.from_parts(
+            l_morphisms + r_morphisms, MonoidalObject.from_names(l_domain + r_domain),
+            MonoidalObject.from_names(l_codomain + r_codomain)))
+            for (l_morphisms, l_domain, l_codomain), (r_morphisms, r_domain, r_codomain) in zip(left, right)])
+
+    @staticmethod
+    def _parts_(morphism) -> (tuple, tuple, tuple):
+        # the flat morphisms of a layer with the names of its domain and codomain
+        morphisms = tuple(morphism.morphisms) if isinstance(morphism, MonoidalMorphism) else (morphism,)
+        return morphisms, morphism.domain.names, morphism.codomain.names
+
+    @staticmethod
+    def _padding_(objects: MonoidalObject) -> (tuple, tuple, tuple):
+        return tuple(IdentityMorphism(MonoidalObject(name)) for name in objects.names), objects.names, objects.names
+
+    def to_state(self) -> tuple:
+        # Compact, picklable form: one string table and every layer as tuples of integers
+        #   (name, [(kind, is_swap, [(morphism name, domain, codomain), ...]), ...], string table)
+        # kind is 0 for a bare morphism and 1 for a tensor product, a morphism name of -1 marks an identity.
+        table = dict()
+
+        def code(string: str) -> int:
+            return table.setdefault(string, len(table))
+
+        def codes(objects: MonoidalObject) -> tuple:
+            return tuple(code(n) for n in objects.names)
+
+        layers = []
+        for d in self._diagrams:
+            if isinstance(d.morphism, MonoidalMorphism):
+                kind, is_swap, morphisms = 1, d.morphism.is_swap, d.morphism.morphisms
+            else:
+                kind, is_swap, morphisms = 0, False, [d.morphism]
+            records = tuple((-1, codes(m.domain), ()) if isinstance(m, IdentityMorphism)
+                            else (code(m.name), codes(m.domain), codes(m.codomain)) for m in morphisms)
+            layers.append((code(d.name), kind, is_swap, records))
+        name = -1 if self._name is None else code(self._name)
+        return name, tuple(layers), tuple(table)
+
+    @staticmethod
+    def from_state(state: tuple):
+        name, layers, table = state
+        cache = dict()
+
+        def objects(codes: tuple) -> MonoidalObject:
+            if codes not in cache:
+                cache[codes] = MonoidalObject(*[table[c] for c in codes])
+            return cache[codes]
+
+        diagrams = []
+        for diagram_name, kind, is_swap, records in layers:
+            morphisms = [IdentityMorphism(objects(dom)) if m < 0
+                         else NamedMorphism(domain=objects(dom), codomain=objects(cod), name=table[m])
+                         for m, dom, cod in records]
+            morphism = MonoidalMorphism(*morphisms, is_swap=is_swap) if kind else morphisms[0]
+            diagrams.append(Diagram(morphism, name=table[diagram_name]))
+        sd = StringDiagram._from_woven(diagrams)
+        sd._name = None if name < 0 else table[name]
+        return sd
+
+    def __reduce__(self):
+        return StringDiagram.from_state, (self.to_state(),)
+
+    @staticmethod
+    def _npz_path(file):
+        # file names get the suffix np.savez would add, open files are used as they are
+        if isinstance(file, (str, os.PathLike)):
+            file = os.fspath(file)
+            if not file.endswith(".npz"):
+                file += ".npz"
+        return file
+
+    def save(self, file):
+        # Binary form of to_state as flat integer arrays in an uncompressed .npz, readable without pickle. A file
+        # name without the .npz suffix gets it, here and in load, so the same name reads back what was saved:
+        #   strings, string_ends                utf-8 string table, end offset of every string
+        #   name                                [name of the diagram or -1]
+        #   layer_name, layer_kind, layer_swap  one entry per layer, layer_ends: end of its morphisms
+        #   morphism_name                       one entry per morphism, -1 for identities
+        #   domain_size, codomain_size, wires   domain then codomain wire codes of every morphism, back to back
+        name, layers, table = self.to_state()
+        encoded = [string.encode("utf-8") for string in table]
+        records = [record for _, _, _, layer_records in layers for record in layer_records]
+        np.savez(StringDiagram._npz_path(file),
+                 version=np.array([StringDiagram.FORMAT_VERSION], dtype=np.int32),
+                 strings=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+                 string_ends=np.cumsum([len(e) for e in encoded], dtype=np.int64),
+                 name=np.array([name], dtype=np.int32),
+                 layer_name=np.array([layer[0] for layer in layers], dtype=np.int32),
+                 layer_kind=np.array([layer[1] for layer in layers], dtype=np.int8),
+                 layer_swap=np.array([layer[2] for layer in layers], dtype=bool),
+                 layer_ends=np.cumsum([len(layer[3]) for layer in layers], dtype=np.int64),
+                 morphism_name=np.array([r[0] for r in records], dtype=np.int32),
+                 domain_size=np.array([len(r[1]) for r in records], dtype=np.int32),
+                 codomain_size=np.array([len(r[2]) for r in records], dtype=np.int32),
+                 wires=np.fromiter(itertools.chain.from_iterable(r[1] + r[2] for r in records), dtype=np.int32))
+
+    @staticmethod
+    def load(file):
+        # restores a diagram written by save, without weaving it again
+        with np.load(StringDiagram._npz_path(file), allow_pickle=False) as data:
+            if int(data["version"][0]) != StringDiagram.FORMAT_VERSION:
+                raise ValueError("Unsupported diagram format version {}!".format(int(data["version"][0])))
+            blob = data["strings"].tobytes()
+            ends = data["string_ends"].tolist()
+            table = tuple(blob[start:end].decode("utf-8") for start, end in zip([0] + ends, ends))
+
+            wires = data["wires"].tolist()
+            records, offset = [], 0
+            for m, n_dom, n_cod in zip(data["morphism_name"].tolist(), data["domain_size"].tolist(),
+                                       data["codomain_size"].tolist()):
+                records.append((m, tuple(wires[offset:offset + n_dom]),
+                                tuple(wires[offset + n_dom:offset + n_dom + n_cod])))
+                offset += n_dom + n_cod
+
+            layer_ends = data["layer_ends"].tolist()
+            layers = tuple((layer_name, kind, is_swap, tuple(records[start:end]))
+                           for layer_name, kind, is_swap, start, end in zip(data["layer_name"].tolist(),
+                                                                            data["layer_kind"].tolist(),
+                                                                            data["layer_swap"].tolist(),
+                                                                            [0] + layer_ends, layer_ends))
+            name = int(data["name"][0])
+        return StringDiagram.from_state((name, layers, table))
 
     def __mul__(self, other):
         return self.compose(other)
 
+    def __matmul__(self, other):
+        return self.tensor(other)
+
     def __len__(self):
         return len(self.diagrams)
 
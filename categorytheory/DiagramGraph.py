@@ -0,0 +1,396 @@
+import array
+from collections.abc import Mapping, ItemsView, ValuesView
+
+import numpy as np
+
+from categorytheory.WireAlphabet import WireAlphabet
+
+
+class DiagramGraph:
+    # Nodes and edges of a diagram drawn slice by slice, stored column-wise in typed arrays, one entry per node or
+    # edge, instead of one dict each. Names are interned in a WireAlphabet and ids are formatted only when asked for.
+    #   nodes: kind, name, rank (row), col (index in its slice), x (center), width
+    #   edges: source and target node, wire name, x where the wire leaves the source and where it enters the target
+    # `nodes` and `edges` are read-only {id: dict} views laid out like the dict graph built before.
+    KINDS = ("IdentityMorphism", "NamedMorphism")
+    TAU = "\u03C4"  # Greek letter tau, name of the braids
+
+    def __init__(self, names: WireAlphabet or None = None, padding: float = 0.5, offset: float = 0):
+        self.names = WireAlphabet() if names is None else names
+        self.kinds = list(DiagramGraph.KINDS)
+        self.padding = padding
+        self.offset = offset
+
+        self.node_kind = array.array("B")
+        self.node_name = array.array("i")
+        self.node_rank = array.array("i")
+        self.node_col = array.array("i")
+        self.node_x = array.array("d")
+        self.node_width = array.array("d")
+
+        self.edge_source = array.array("i")
+        self.edge_target = array.array("i")
+        self.edge_name = array.array("i")
+        self.edge_repeat = array.array("H")  # wires before this one with the same source, target and name
+        self.edge_source_x = array.array("d")
+        self.edge_target_x = array.array("d")
+        self._repeats = dict()  # (source, name) -> count, for the edges of the last target
+
+        self.rows = 0
+        self.columns = 0
+
+    @property
+    def size(self) -> (int, int):
+        return self.rows, self.columns
+
+    @property
+    def nodes(self):
+        return NodeView(self)
+
+    @property
+    def edges(self):
+        return EdgeView(self)
+
+    def row_range(self, rank: int) -> (int, int):
+        # nodes of a row are consecutive, rows are added top to bottom
+        ranks = np.frombuffer(self.node_rank, dtype=np.int32)
+        return int(np.searchsorted(ranks, rank, "left")), int(np.searchsorted(ranks, rank, "right"))
+
+    def copy(self, rows: int or None = None):
+        # the first `rows` rows, nodes and the edges into them
+        rows = self.rows if rows is None else min(rows, self.rows)
+        nodes = self.row_range(rows)[0]
+        edges = int(np.searchsorted(np.frombuffer(self.edge_target, dtype=np.int32), nodes, "left"))
+
+        graph = DiagramGraph(names=WireAlphabet(self.names.names), padding=self.padding, offset=self.offset)
+        graph.kinds = list(self.kinds)
+        for field in ("node_kind", "node_name", "node_rank", "node_col", "node_x", "node_width"):
+            setattr(graph, field, getattr(self, field)[:nodes])
+        for field in ("edge_source", "edge_target", "edge_name", "edge_repeat", "edge_source_x", "edge_target_x"):
+            setattr(graph, field, getattr(self, field)[:edges])
+        graph.rows = rows
+        graph.columns = int(max(graph.node_col, default=-1)) + 1
+        return graph
+
+    @staticmethod
+    def from_dicts(nodes: Mapping, edges: Mapping or None = None, padding: float = 0.5, offset: float = 0):
+        # the graph of {id: dict} nodes and edges laid out like the `nodes` and `edges` views, in the order given
+        graph = DiagramGraph(padding=padding, offset=offset)
+        index = dict()
+        for node_id, node in nodes.items():
+            index[node_id] = graph.add_node(kind=node["type"], name=node["name"], rank=node["index_position"]["y"],
+                                            col=node["index_position"]["x"], x=node["position"]["x"],
+                                            width=node["width"])
+        for edge in (edges or {}).values():
+            graph.add_edge(source=index[edge["source_node"]], target=index[edge["target_node"]], name=edge["name"],
+                           source_x=edge["source_position"]["x"], target_x=edge["target_position"]["x"])
+        return graph
+
+    def node_count(self) -> int:
+        return len(self.node_kind)
+
+    def edge_count(self) -> int:
+        return len(self.edge_source)
+
+    @staticmethod
+    def layout(wires: list, counts: list, padding: float = 0.5, offset: float = 0) -> (np.ndarray, np.ndarray):
+        # Centers and widths of the nodes of every slice, in one pass for the whole diagram. A node takes a pocket of
+        # 2 * padding per wire on its wider side and the nodes of a slice are packed left to right from `offset`:
+        #   wires: [1 2 1 | 3]  =>  widths: [1 2 1 | 3]  =>  x: [0.5 2 3.5 | 1.5]    (padding 0.5)
+        # Wires of a node are spread evenly over its width, so every wire of the k-th pocket is at its middle.
+        widths = np.asarray(wires, dtype=np.float64) * (padding * 2)
+        ends = np.cumsum(widths)
+        # width of the slices before each node's slice, to start every slice again at `offset`
+        counts = np.asarray(counts, dtype=np.intp)
+        slice_start = np.repeat(np.concatenate(([0.0], ends))[np.cumsum(counts) - counts], counts)
+        return offset + (ends - widths - slice_start) + widths / 2, widths
+
+    def add_node(self, kind: str, name: str, rank: int, col: int, x: float, width: float) -> int:
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+        self.node_kind.append(self.kinds.index(kind))
+        self.node_name.append(self.names.code(name))
+        self.node_rank.append(rank)
+        self.node_col.append(col)
+        self.node_x.append(x)
+        self.node_width.append(width)
+        self.rows = max(self.rows, rank + 1)
+        self.columns = max(self.columns, col + 1)
+        return len(self.node_kind) - 1
+
+    def add_edge(self, source: int, target: int, name: str, source_x: float, target_x: float) -> int:
+        code = self.names.code(name)
+        if not self.edge_target or self.edge_target[-1] != target:
+            self._repeats.clear()
+        repeat = self._repeats.get((source, code), 0)
+        self._repeats[(source, code)] = repeat + 1
+
+        self.edge_source.append(source)
+        self.edge_target.append(target)
+        self.edge_name.append(code)
+        self.edge_repeat.append(repeat)
+        self.edge_source_x.append(source_x)
+        self.edge_target_x.append(target_x)
+        return len(self.edge_source) - 1
+
+    def kind(self, node: int) -> str:
+        return self.kinds[self.node_kind[node]]
+
+    def name(self, node: int) -> str:
+        return self.names.name(self.node_name[node])
+
+    def node_id(self, node: int) -> str:
+        # strings are labelled with their wire, but named after the identity morphism, e.g. id_{a}_(0)_(1)
+        name = self.name(node)
+        if self.node_kind[node] == 0:
+            name = "id_{" + name + "}"
+        return "{}_({})_({})".format(name, self.node_rank[node], self.node_col[node])
+
+    def edge_id(self, edge: int) -> str:
+        # a box taking the same wire more than once from the same box gets one edge per wire, numbered after the first
+        edge_id = "[{}]*[{}]_{}".format(self.node_id(self.edge_source[edge]), self.node_id(self.edge_target[edge]),
+                                        self.names.name(self.edge_name[edge]))
+        if self.edge_repeat[edge]:
+            edge_id += "_{}".format(self.edge_repeat[edge])
+        return edge_id
+
+    def node(self, node: int) -> dict:
+        rank = self.node_rank[node]
+        return {"id": self.node_id(node), "name": self.name(node),
+                "index_position": {"y": rank, "x": self.node_col[node]},
+                "position": {"y": rank, "x": self.node_x[node]},
+                "type": self.kind(node), "width": self.node_width[node]}
+
+    def edge(self, edge: int) -> dict:
+        source, target = self.edge_source[edge], self.edge_target[edge]
+        return {"id": self.edge_id(edge), "source_node": self.node_id(source), "target_node": self.node_id(target),
+                "name": self.names.name(self.edge_name[edge]),
+                "source_position": {"y": self.node_rank[source], "x": self.edge_source_x[edge]},
+                "target_position": {"y": self.node_rank[target], "x": self.edge_target_x[edge]}}
+
+    @staticmethod
+    def color(name: str) -> str:
+        # derived from the name, so a wire has the same color in every drawing
+        from colorhash import ColorHash
+        return "rgb({}, {}, {})".format(*ColorHash(name).rgb)
+
+    def colormap(self) -> dict:
+        # one color per wire name
+        codes = np.unique(np.frombuffer(self.node_name, dtype=np.int32)[np.frombuffer(self.node_kind, np.uint8) == 0])
+        return {self.names.name(code): DiagramGraph.color(self.names.name(code)) for code in codes.tolist()}
+
+    def node_element(self, node: int, scale: int, label_strings: bool = True, colormap: dict or None = None,
+                     max_rank: int or None = None) -> dict:
+        # cytoscape node, strings are colored from `colormap` if given and always labelled in the first row and in
+        # row `max_rank`
+        data = self.node(node)
+        kind = self.kind(node)
+        if kind == "NamedMorphism" and DiagramGraph.TAU in data["name"]:
+            data["shape"] = "round-rectangle"
+            data["opacity"] = 1
+            data["label"] = DiagramGraph.TAU
+            data["height"] = scale / 4
+            data["width"] = data["width"] * scale
+            data["color"] = "white"
+        elif kind == "NamedMorphism":
+            data["shape"] = "round-rectangle"
+            data["opacity"] = 1
+            data["label"] = data["name"]
+            data["height"] = scale / 2
+            data["width"] = data["width"] * scale
+            data["color"] = "#dcdcdc"
+        elif kind == "IdentityMorphism" and data["name"] == "[]":
+            data["height"] = 0
+            data["width"] = 0
+            data["opacity"] = 0
+        elif kind == "IdentityMorphism":
+            if label_strings or data["position"]["y"] == 0 or data["position"]["y"] == max_rank:
+                data["label"] = data["name"]
+                data["shape"] = "ellipse"
+                data["opacity"] = 1
+                data["height"] = scale / 4
+                data["width"] = scale / 4
+            else:
+                data["shape"] = "ellipse"
+                data["opacity"] = 1
+                data["height"] = 0.5
+                data["width"] = 0.5
+            data["color"] = colormap[data["name"]] if colormap is not None else "#dcdcdc"
+        position = {key: val * scale for key, val in data["position"].items()}
+        return {"data": data, "position": position, "group": "nodes"}
+
+    def edge_element(self, edge: int, scale: int) -> dict:
+        # cytoscape edge, the endpoints are given relative to the center of the nodes
+        source, target = self.edge_source[edge], self.edge_target[edge]
+        data = {"id": self.edge_id(edge),
+                "source_position": "{} {}".format((self.edge_source_x[edge] - self.node_x[source]) * scale, "50%"),
+                "target_position": "{} {}".format((self.edge_target_x[edge] - self.node_x[target]) * scale, "-50%"),
+                "source": self.node_id(source), "target": self.node_id(target),
+                "label": self.names.name(self.edge_name[edge])}
+        return {"data": data, "group": "edges"}
+
+    def to_vis(self, scale: int, label_strings: bool = True, color_nodes: bool = False) -> list:
+        # cytoscape elements, nodes first
+        colormap = Colors() if color_nodes else None
+        max_rank = max(self.node_rank, default=0)
+        cyto = [self.node_element(i, scale=scale, label_strings=label_strings, colormap=colormap, max_rank=max_rank)
+                for i in range(self.node_count())]
+        cyto.extend(self.edge_element(j, scale=scale) for j in range(self.edge_count()))
+        return cyto
+
+    def iter_vis(self, scale: int, label_strings: bool = True, color_nodes: bool = False):
+        # the elements of to_vis row by row, the nodes of a row and then the edges into it, in the order
+        # Diagram.iter_vis_from_slices streams them. Edges are added with the row of their target.
+        colormap = Colors() if color_nodes else None
+        max_rank = max(self.node_rank, default=0)
+        node, edge = 0, 0
+        while node < self.node_count():
+            rank = self.node_rank[node]
+            start, stop = self.row_range(rank)
+            for i in range(start, stop):
+                yield self.node_element(i, scale=scale, label_strings=label_strings, colormap=colormap,
+                                        max_rank=max_rank)
+            while edge < self.edge_count() and self.node_rank[self.edge_target[edge]] == rank:
+                yield self.edge_element(edge, scale=scale)
+                edge += 1
+            node = stop
+
+    def tail(self):
+        # the nodes of the last row alone, sharing the name table, to add the rows below it and drop the ones above
+        start, stop = self.row_range(self.rows - 1)
+        graph = DiagramGraph(names=self.names, padding=self.padding, offset=self.offset)
+        graph.kinds = self.kinds
+        for field in ("node_kind", "node_name", "node_rank", "node_col", "node_x", "node_width"):
+            setattr(graph, field, getattr(self, field)[start:stop])
+        graph.rows = self.rows
+        graph.columns = self.columns
+        return graph
+
+    def array_names(self) -> list:
+        # name of every value of to_array, value k is names[k - 1], 0 is empty
+        return [self.names.name(code) for code in self._array_codes().tolist()]
+
+    def array_palette(self) -> np.ndarray:
+        # RGB color of every value of to_array, white for the empty cells, wires have their colors from to_vis
+        from colorhash import ColorHash
+        return np.array([(255, 255, 255)] + [ColorHash(name).rgb for name in self.array_names()], dtype=np.uint8)
+
+    def _array_codes(self) -> np.ndarray:
+        # the name codes drawn, in the order the names first appear
+        return np.unique(np.frombuffer(self.node_name, dtype=np.int32))
+
+    def array_spans(self) -> (np.ndarray, np.ndarray, np.ndarray):
+        # row, first cell and number of cells of every node, one cell per wire on its wider side
+        pocket = self.padding * 2 or 1
+        widths = np.frombuffer(self.node_width, dtype=np.float64)
+        left = np.frombuffer(self.node_x, dtype=np.float64) - widths / 2 - self.offset
+        return (np.frombuffer(self.node_rank, dtype=np.int32).astype(np.intp), np.rint(left / pocket).astype(np.intp),
+                np.rint(widths / pocket).astype(np.intp))
+
+    def to_array(self, sparse: bool = False, size: tuple or None = None):
+        # Raster of the diagram, a row per slice and a cell per wire, every node fills the cells under it with the
+        # number of its name, see array_names. The numbers only depend on the diagram, and the dtype is the smallest
+        # unsigned integer holding them. With `sparse`, a scipy.sparse COO matrix with the filled cells.
+        # With `size`, the raster has that (rows, columns) shape and the cells outside it are left out.
+        codes = self._array_codes()
+        values = np.searchsorted(codes, np.frombuffer(self.node_name, dtype=np.int32)) + 1
+        dtype = np.min_scalar_type(len(codes))
+        rows, starts, lengths = self.array_spans()
+
+        # expand every span into its cells
+        cells = int(lengths.sum())
+        span_start = np.cumsum(lengths) - lengths
+        cell_rows = np.repeat(rows, lengths)
+        cell_cols = np.repeat(starts, lengths) + (np.arange(cells) - np.repeat(span_start, lengths))
+        cell_values = np.repeat(values, lengths).astype(dtype)
+        shape = (self.rows, int(cell_cols.max(initial=-1)) + 1)
+        if size is not None:
+            shape = tuple(int(n) for n in size)
+            inside = (cell_rows < shape[0]) & (cell_cols < shape[1])
+            cell_rows, cell_cols, cell_values = cell_rows[inside], cell_cols[inside], cell_values[inside]
+
+        if sparse:
+            try:
+                from scipy.sparse import coo_matrix
+            except ImportError:
+                raise ImportError("scipy is needed for sparse arrays!")
+            return coo_matrix((cell_values, (cell_rows, cell_cols)), shape=shape)
+
+        myarray = np.zeros(shape, dtype=dtype)
+        myarray[cell_rows, cell_cols] = cell_values
+        return myarray
+
+
+class Colors(dict):
+    # wire name -> color, filled in as names are looked up
+    def __missing__(self, name: str) -> str:
+        color = self[name] = DiagramGraph.color(name)
+        return color
+
+
+class _GraphView(Mapping):
+    # {id: dict} over the nodes or edges of a graph, the dicts are built on access and changing them does not change
+    # the graph. Looking up an id builds the id index once.
+    def __init__(self, graph: DiagramGraph):
+        self.graph = graph
+        self._index = None
+
+    def _count(self) -> int:
+        raise NotImplementedError
+
+    def _id(self, i: int) -> str:
+        raise NotImplementedError
+
+    def _value(self, i: int) -> dict:
+        raise NotImplementedError
+
+    def __getitem__(self, key: str) -> dict:
+        if self._index is None or len(self._index) != self._count():
+            self._index = {self._id(i): i for i in range(self._count())}
+        return self._value(self._index[key])
+
+    def __iter__(self):
+        return (self._id(i) for i in range(self._count()))
+
+    def __len__(self):
+        return self._count()
+
+    def items(self):
+        return _GraphItems(self)
+
+    def values(self):
+        return _GraphValues(self)
+
+
+class _GraphItems(ItemsView):
+    def __iter__(self):
+        view = self._mapping
+        return ((view._id(i), view._value(i)) for i in range(view._count()))
+
+
+class _GraphValues(ValuesView):
+    def __iter__(self):
+        view = self._mapping
+        return (view._value(i) for i in range(view._count()))
+
+
+class NodeView(_GraphView):
+    def _count(self) -> int:
+        return self.graph.node_count()
+
+    def _id(self, i: int) -> str:
+        return self.graph.node_id(i)
+
+    def _value(self, i: int) -> dict:
+        return self.graph.node(i)
+
+
+class EdgeView(_GraphView):
+    def _count(self) -> int:
+        return self.graph.edge_count()
+
+    def _id(self, i: int) -> str:
+        return self.graph.edge_id(i)
+
+    def _value(self, i: int) -> dict:
+        return self.graph.edge(i)
@@ -0,0 +1,48 @@
+import io
+import json
+
+
+class JsonStream:
+    # Writes a JSON array one element at a time, as the elements are produced, so a drawing never has to be held
+    # as a whole or serialized twice. Encodes with orjson when it is installed and with json otherwise. Elements
+    # are buffered up to `buffer_size` bytes between writes.
+    BUFFER_SIZE = 1 << 16
+
+    @staticmethod
+    def encoder():
+        # element -> utf-8 bytes
+        try:
+            import orjson
+            return orjson.dumps
+        except ImportError:
+            return lambda element: json.dumps(element).encode("utf-8")
+
+    @staticmethod
+    def chunks(elements, buffer_size: int = BUFFER_SIZE):
+        # the array in pieces of about `buffer_size` bytes, split between elements
+        encode = JsonStream.encoder()
+        buffer = bytearray(b"[")
+        for i, element in enumerate(elements):
+            if i:
+                buffer += b","
+            buffer += encode(element)
+            if len(buffer) >= buffer_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]"
+        yield bytes(buffer)
+
+    @staticmethod
+    def write(elements, fp, buffer_size: int = BUFFER_SIZE) -> int:
+        # to a binary or text file object, socket file or response stream, returns the number of bytes
+        text = isinstance(fp, io.TextIOBase)
+        written = 0
+        for chunk in JsonStream.chunks(elements, buffer_size=buffer_size):
+            fp.write(chunk.decode("utf-8") if text else chunk)
+            written += len(chunk)
+        return written
+
+    @staticmethod
+    def dump(elements, filename: str, buffer_size: int = BUFFER_SIZE) -> int:
+        with open(filename, "wb") as outfile:
+            return JsonStream.write(elements, outfile, buffer_size=buffer_size)
@@ -1,24 +1,74 @@
-from sympy import Basic, Symbol
-from sympy.categories import Object, Category, Morphism, IdentityMorphism, NamedMorphism
+import itertools
+import threading
+import weakref
+
+
+def atom_name(x) -> str or None:
+    # name of a single object: a string, or anything named by a string such as a sympy Object. sympy is not imported
+    # for this, the core only ever stores the names.
+    if isinstance(x, str):
+        return x
+    name = getattr(x, "name", None)
+    return name if isinstance(name, str) and not isinstance(x, MonoidalObject) else None
 
 
 class MonoidalObject:
     # https://github.com/oxford-quantum-group/discopy/blob/main/discopy/monoidal.py
-    def __init__(self, *objects):
-        self._objects = tuple(
-            x if isinstance(x, Object) or x == [] else Object(x) for x in objects)
+    #
+    # Monoidal objects are hash-consed: equal tensor products share one instance, so the name, hash and
+    # tuple of objects are computed once and equality is an identity check. The objects are their names, plain
+    # strings, sympy Objects given to the constructor are stored by name.
+    __slots__ = ("_names", "_name", "_hash", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()  # tuple of object names -> MonoidalObject
+    _intern_lock = threading.Lock()
+
+    def __new__(cls, *objects):
+        names = []
+        for x in objects:
+            if type(x) is str:
+                names.append(x)
+            elif isinstance(x, MonoidalObject):
+                names.extend(x._names)
+            elif not (isinstance(x, list) and x == []):  # the empty list is the monoidal unit
+                name = atom_name(x)
+                names.append(str(x) if name is None else name)
+        return cls.from_names(tuple(names))
+
+    @classmethod
+    def from_names(cls, names: tuple):
+        # the tensor product of a tuple of object names, without looking at every name again
+        self = cls._interned.get(names)
+        if self is None:
+            with cls._intern_lock:
+                self = cls._interned.get(names)
+                if self is None:
+                    self = object.__new__(cls)
+                    self._names = names
+                    self._name = " @ ".join(names)
+                    self._hash = hash(self._name)
+                    cls._interned[names] = self
+        return self
 
     @property
     def objects(self):
-        return list(self._objects)
+        return list(self._names)
+
+    @property
+    def tuple_view(self):
+        return self._names
+
+    @property
+    def names(self):
+        return self._names
 
     @property
     def name(self):
-        return " @ ".join([o.name for o in self.objects])
+        return self._name
 
     def asdict(self):
         return dict(name=self.name,
-                    objects=[o.name for o in self.objects],
+                    objects=list(self._names),
                     type="MonoidalObject")
 
     def is_Symbol(self):
@@ -30,28 +80,40 @@ class MonoidalObject:
     def __str__(self):
         return self.name
 
+    def __repr__(self):
+        return "MonoidalObject({})".format(", ".join(repr(n) for n in self._names))
+
     def __len__(self):
-        return len(self.objects)
+        return len(self._names)
 
     def __iter__(self):
-        for i in range(len(self)):
-            yield self[i]
+        return iter(self._names)
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            return MonoidalObject(*self.objects[key])
-        return self.objects[key]
+            return MonoidalObject(*self._names[key])
+        return self._names[key]
+
+    def __reduce__(self):
+        # re-intern on unpickling
+        return MonoidalObject, self._names
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def tensor(self, *others):
         for other in others:
             if not isinstance(other, MonoidalObject):
                 raise TypeError("Can only tensor MonoidalObject!")
         # Add all objects within Monoidal Objects
-        return MonoidalObject(*sum([m.objects for m in [self] + list(others)], []))
+        return MonoidalObject(*self._names, *itertools.chain.from_iterable(m._names for m in others))
 
     def count(self, ob):
         ob, = ob if isinstance(ob, MonoidalObject) else (ob,)
-        return self.objects.count(ob)
+        return self._names.count(atom_name(ob))
 
     def __matmul__(self, other):
         return self.tensor(other)
@@ -62,24 +124,74 @@ class MonoidalObject:
     def __eq__(self, other):
         if not isinstance(other, MonoidalObject):
             raise TypeError("Can only check equality for MonoidalObject!")
-        return self.objects == other.objects
+        return self is other
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
 
     def __sympy__(self):
         return self
 
 
-class NamedMorphism(NamedMorphism):
-    def __new__(cls, domain, codomain, name):
+class Morphism:
+    # Native morphisms are plain slotted classes so the Diagram engine never pays for sympy's Basic
+    # construction. Use to_sympy() and from_sympy() to move between this core and sympy.categories, sympy is
+    # only imported by them.
+    __slots__ = ()
+
+    @property
+    def domain(self) -> MonoidalObject:
+        return self._domain
+
+    @property
+    def codomain(self) -> MonoidalObject:
+        raise NotImplementedError
+
+    @property
+    def name(self) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def _as_monoidal_object(obj) -> MonoidalObject:
+        return obj if isinstance(obj, MonoidalObject) else MonoidalObject(obj)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self.name)
+
+
+class NamedMorphism(Morphism):
+    __slots__ = ("_domain", "_codomain", "_name", "_hash")
+
+    def __init__(self, domain, codomain, name):
         if not name:
             raise ValueError("Empty morphism names not allowed.")
 
-        if not isinstance(name, Symbol):
-            name = Symbol(name)
+        self._domain = Morphism._as_monoidal_object(domain)
+        self._codomain = Morphism._as_monoidal_object(codomain)
+        self._name = name if isinstance(name, str) else str(name)
+        self._hash = hash((self._name, self._domain, self._codomain))
+
+    @property
+    def codomain(self):
+        return self._codomain
+
+    @property
+    def name(self):
+        return self._name
 
-        return Basic.__new__(cls, domain, codomain, name)
+    def __eq__(self, other):
+        if isinstance(other, NamedMorphism):
+            return self._name == other._name and self._domain is other._domain and self._codomain is other._codomain
+        return NotImplemented
+
+    def __hash__(self):
+        return self._hash
 
     def __iter__(self):
         yield "domain", self.domain.asdict()
@@ -87,24 +199,39 @@ class NamedMorphism(NamedMorphism):
         yield "name", self.name
         yield "type", "NamedMorphism"
 
+    def __reduce__(self):
+        return NamedMorphism, (self._domain, self._codomain, self._name)
+
     def inverse(self):
         return NamedMorphism(name=self.name, domain=self.codomain, codomain=self.domain)
 
+    def to_sympy(self):
+        from sympy import Basic, Symbol, categories
+        return Basic.__new__(categories.NamedMorphism, self._domain, self._codomain, Symbol(self._name))
+
 
-class IdentityMorphism(IdentityMorphism):
-    def __new__(cls, domain):
-        if isinstance(domain, Object):
-            return Basic.__new__(cls, MonoidalObject(domain))  # make all objects MonoidalObjects
-        return Basic.__new__(cls, domain)
+class IdentityMorphism(Morphism):
+    __slots__ = ("_domain", "_name")
+
+    def __init__(self, domain):
+        self._domain = Morphism._as_monoidal_object(domain)  # make all objects MonoidalObjects
+        self._name = "id_{" + self._domain.name + "}"
+
+    @property
+    def codomain(self):
+        return self._domain
 
     @property
     def name(self):
-        return "id_{{{}}}".format(self.domain.name)
+        return self._name
 
     def __eq__(self, other):
         if isinstance(other, IdentityMorphism):
-            return self.name == other.name
-        return NotImplementedError
+            return self._domain is other._domain
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._name)
 
     def __iter__(self):
         yield "domain", self.domain.asdict()
@@ -112,13 +239,19 @@ class IdentityMorphism(IdentityMorphism):
         yield "name", self.name
         yield "type", "IdentityMorphism"
 
+    def __reduce__(self):
+        return IdentityMorphism, (self._domain,)
+
     def inverse(self):
         return self
 
+    def to_sympy(self):
+        from sympy import Basic, categories
+        return Basic.__new__(categories.IdentityMorphism, self._domain)
+
 
 class MonoidalMorphism(Morphism):
-    def __new__(cls, *morphisms, is_swap: bool = False):
-        return Basic.__new__(cls, *morphisms)
+    __slots__ = ("_morphisms", "_is_swap", "_domain", "_codomain", "_name")
 
     def __init__(self, *morphisms, is_swap: bool = False):
         m = []
@@ -126,9 +259,28 @@ class MonoidalMorphism(Morphism):
             if isinstance(x, (IdentityMorphism, NamedMorphism)):
                 m.append(x)
             elif isinstance(x, MonoidalMorphism):
-                m = m + x.morphisms
+                m.extend(x._morphisms)
         self._morphisms = tuple(m)
         self._is_swap = is_swap
+        self._name = None
+
+        # flatten the signature once, domain and codomain are read on every weave, braid and graph step
+        self._domain = MonoidalObject.from_names(
+            tuple(itertools.chain.from_iterable(x.domain.names for x in self._morphisms)))
+        self._codomain = MonoidalObject.from_names(
+            tuple(itertools.chain.from_iterable(x.codomain.names for x in self._morphisms)))
+
+    @staticmethod
+    def from_parts(morphisms: tuple, domain: MonoidalObject, codomain: MonoidalObject, is_swap: bool = False):
+        # tensor product of a flat tuple of Identity- and NamedMorphisms whose signature is already known, braid
+        # layers are built like this so the wires are not flattened again for every layer
+        self = MonoidalMorphism.__new__(MonoidalMorphism)
+        self._morphisms = morphisms
+        self._is_swap = is_swap
+        self._name = None
+        self._domain = domain
+        self._codomain = codomain
+        return self
 
     @property
     def morphisms(self):
@@ -136,15 +288,13 @@ class MonoidalMorphism(Morphism):
 
     @property
     def name(self):
-        return " @ ".join([m.name for m in self.morphisms])
-
-    @property
-    def domain(self):
-        return MonoidalObject(*sum([m.domain.objects for m in self.morphisms], []))
+        if self._name is None:
+            self._name = " @ ".join([m.name for m in self._morphisms])
+        return self._name
 
     @property
     def codomain(self):
-        return MonoidalObject(*sum([m.codomain.objects for m in self.morphisms], []))
+        return self._codomain
 
     @property
     def is_swap(self):
@@ -153,7 +303,7 @@ class MonoidalMorphism(Morphism):
         return self._is_swap
 
     def inverse(self):
-        return MonoidalMorphism(*[m.inverse() for m in self.morphisms])
+        return MonoidalMorphism(*[m.inverse() for m in self._morphisms])
 
     def tensor(self, *others):
         valid_others = []
@@ -164,19 +314,14 @@ class MonoidalMorphism(Morphism):
                 valid_others.append(MonoidalMorphism(other))
             else:
                 valid_others.append(other)
-        return MonoidalMorphism(
-            *sum([m.morphisms for m in [self] + list(valid_others)], [])
-        )
+        return MonoidalMorphism(self, *valid_others)
 
     def slice(self):
-        domain_id = [IdentityMorphism(o) for o in self.domain.objects]
+        domain_id = [IdentityMorphism(o) for o in self._domain.tuple_view]
         morphisms = self.morphisms
-        codomain_id = [IdentityMorphism(o) for o in self.codomain.objects]
+        codomain_id = [IdentityMorphism(o) for o in self._codomain.tuple_view]
         return [domain_id, morphisms, codomain_id]
 
-    def __str__(self):
-        return self.name
-
     def __add__(self, other):
         return self.tensor(other)
 
@@ -188,16 +333,92 @@ class MonoidalMorphism(Morphism):
     def __hash__(self):
         return hash(self.name)
 
+    def __reduce__(self):
+        return _monoidal_morphism, (self._morphisms, self._is_swap)
+
     def asdict(self):
-        return [dict(m) for m in self.morphisms]
+        return [dict(m) for m in self._morphisms]
+
+    def to_sympy(self):
+        return _sympy_monoidal_morphism()(*[m.to_sympy() for m in self._morphisms])
 
-    def __sympy__(self):
-        return self
 
+def _monoidal_morphism(morphisms: tuple, is_swap: bool) -> MonoidalMorphism:
+    return MonoidalMorphism(*morphisms, is_swap=is_swap)
 
-class MonoidalCategory(Category):
+
+_sympy_classes = dict()  # class name -> class subclassing sympy, made on first use
+
+
+def _sympy_monoidal_morphism():
+    # sympy side of MonoidalMorphism.to_sympy(), so tensor products can take part in sympy categories
+    cls = _sympy_classes.get("SympyMonoidalMorphism")
+    if cls is None:
+        from sympy import Basic, categories
+
+        class SympyMonoidalMorphism(categories.Morphism):
+            def __new__(cls, *morphisms):
+                return Basic.__new__(cls, *morphisms)
+
+            @property
+            def domain(self):
+                return MonoidalObject(*[m.domain for m in self.args])
+
+            @property
+            def codomain(self):
+                return MonoidalObject(*[m.codomain for m in self.args])
+
+            @property
+            def name(self):
+                return " @ ".join([from_sympy(m).name for m in self.args])
+
+        SympyMonoidalMorphism.__module__ = __name__
+        SympyMonoidalMorphism.__qualname__ = "SympyMonoidalMorphism"  # found by pickle through __getattr__ below
+        cls = _sympy_classes.setdefault("SympyMonoidalMorphism", SympyMonoidalMorphism)
+    return cls
+
+
+def from_sympy(morphism) -> Morphism:
+    if isinstance(morphism, Morphism):
+        return morphism
+    from sympy import categories
+    if isinstance(morphism, categories.IdentityMorphism):
+        return IdentityMorphism(morphism.domain)
+    if isinstance(morphism, categories.NamedMorphism):
+        return NamedMorphism(domain=morphism.domain, codomain=morphism.codomain, name=morphism.name)
+    if isinstance(morphism, _sympy_monoidal_morphism()):
+        return MonoidalMorphism(*[from_sympy(m) for m in morphism.args])
+    raise TypeError("Cannot convert {} from sympy, composites belong in a StringDiagram!".format(morphism))
+
+
+def __getattr__(name: str):
+    # SympyMonoidalMorphism subclasses sympy, it is only made when asked for
+    if name == "SympyMonoidalMorphism":
+        return _sympy_monoidal_morphism()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+class MonoidalCategory:
+    # A sympy Category of monoidal objects and the commutative diagrams between them. sympy is imported when the
+    # first category is made, the category is kept in `category` and its attributes are read through.
     def __new__(cls, name, objects, commutative_diagrams):
-        return Category.__new__(cls, name, objects, commutative_diagrams)
+        from sympy.categories import Category
+        self = object.__new__(cls)
+        self.category = Category(name, objects, commutative_diagrams)
+        return self
+
+    def __getattr__(self, name):
+        if name == "category":
+            raise AttributeError(name)
+        return getattr(self.category, name)
+
+    def __eq__(self, other):
+        if isinstance(other, MonoidalCategory):
+            return type(self) is type(other) and self.category == other.category
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.category)
 
     def hom(self, src: MonoidalObject, tar: MonoidalObject):
         return [d.hom(src, tar)[0] for d in self.commutative_diagrams.args]
@@ -211,7 +432,8 @@ class MonoidalCategory(Category):
 
     @staticmethod
     def json_encoder(o):
-        if isinstance(o, Object):
-            return o.name
         if isinstance(o, Morphism):
             return dict(o)
+        name = atom_name(o)
+        if name is not None:
+            return name
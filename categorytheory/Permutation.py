@@ -0,0 +1,122 @@
+import numpy as np
+
+from categorytheory.WireAlphabet import WireAlphabet
+
+
+class Permutation:
+    # Reordering of the wires of one boundary into the order of another.
+    #   target[i] = position in `b` of the wire at position i in `a`
+    # Repeated wires keep their relative order, so the permutation is always the one with the fewest crossings.
+    def __init__(self, target):
+        self.target = np.asarray(target, dtype=np.intp)
+
+    @staticmethod
+    def between(a: list, b: list):
+        # raises ValueError if `a` and `b` are not the same multiset of wires
+        alphabet = WireAlphabet()
+        return Permutation(WireAlphabet.permutation(alphabet.encode(a), alphabet.encode(b)))
+
+    @staticmethod
+    def from_word(word: list, n: int):
+        # the permutation of n wires made by the adjacent transpositions in `word`
+        order = list(range(n))  # order[i] = wire now at position i
+        for k in word:
+            order[k], order[k + 1] = order[k + 1], order[k]
+        target = np.empty(n, dtype=np.intp)
+        target[order] = np.arange(n)
+        return Permutation(target)
+
+    @staticmethod
+    def reduce_word(word: list, n: int) -> list:
+        # shortest word for the same permutation, a transposition applied twice or a crossing undone later disappears
+        return Permutation.from_word(word, n).transpositions()
+
+    def __len__(self):
+        return len(self.target)
+
+    def is_identity(self) -> bool:
+        return bool(np.array_equal(self.target, np.arange(len(self.target))))
+
+    def inverse(self):
+        inverse = np.empty_like(self.target)
+        inverse[self.target] = np.arange(len(self.target))
+        return Permutation(inverse)
+
+    def apply(self, wires: list) -> list:
+        # reorder `wires` (laid out like `a`) into the order of `b`
+        reordered = [None] * len(wires)
+        for wire, position in zip(wires, self.target.tolist()):
+            reordered[position] = wire
+        return reordered
+
+    def inversions(self) -> int:
+        # number of crossing pairs, i.e. the length of the shortest adjacent-transposition word, in O(n log n)
+        # with a Fenwick tree over the target positions seen so far
+        n = len(self.target)
+        tree = [0] * (n + 1)
+        inversions = 0
+        for seen, t in enumerate(self.target.tolist()):
+            # count seen targets <= t, every other seen target is bigger and crosses t
+            i, smaller = t + 1, 0
+            while i > 0:
+                smaller += tree[i]
+                i -= i & -i
+            inversions += seen - smaller
+            i = t + 1
+            while i <= n:
+                tree[i] += 1
+                i += i & -i
+        return inversions
+
+    def transpositions(self) -> list:
+        # Shortest word of adjacent transpositions: k stands for swapping positions k and k + 1.
+        # Wires are moved into place left to right, each one moves left past the wires that cross it:
+        #   target: [0 1 3 4 2] => [3 2]
+        # Every swap removes one inversion. Where wire t stands is found with a Fenwick tree over the positions of
+        # the wires already moved into place, so this runs in O(n log n + inversions).
+        n = len(self.target)
+        position = np.empty(n, dtype=np.intp)
+        position[self.target] = np.arange(n)  # position[t] = where the wire with target t starts
+        tree = [0] * (n + 1)
+        word = []
+        for t, p in enumerate(position.tolist()):
+            # wires in front of t are exactly those that cross it: all wires before p, less those already in place
+            i, placed = p, 0
+            while i > 0:
+                placed += tree[i]
+                i -= i & -i
+            offset = p - placed
+            word.extend(range(t + offset - 1, t - 1, -1))
+            i = p + 1
+            while i <= n:
+                tree[i] += 1
+                i += i & -i
+        return word
+
+    def layers(self) -> list:
+        # The crossings grouped into layers of swaps on disjoint wires, by odd-even transposition sort: alternate
+        # rounds compare the pairs starting at even and at odd positions. There are at most len(self) layers,
+        # empty rounds are left out, and the total number of swaps is still the number of inversions.
+        current = self.target.tolist()
+        layers = []
+        parity, quiet = 0, 0  # quiet: rounds in a row without a swap, two of them means sorted
+        while quiet < 2 and len(current) > 1:
+            layer = [k for k in range(parity, len(current) - 1, 2) if current[k] > current[k + 1]]
+            for k in layer:
+                current[k], current[k + 1] = current[k + 1], current[k]
+            if layer:
+                layers.append(layer)
+                quiet = 0
+            else:
+                quiet += 1
+            parity ^= 1
+        return layers
+
+    def swaps(self, wires: list) -> list:
+        # transpositions as (left, right) pairs of the wires that cross, starting from `wires`
+        current = list(wires)
+        swaps = []
+        for k in self.transpositions():
+            swaps.append((current[k], current[k + 1]))
+            current[k], current[k + 1] = current[k + 1], current[k]
+        return swaps
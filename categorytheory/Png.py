@@ -0,0 +1,61 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+class Png:
+    # PNG encoder for diagram rasters (see DiagramGraph.to_array) with numpy and zlib only. Without a palette the
+    # values are drawn as grey levels scaled to 0..255, with a palette (one RGB row per value) in color. Every cell
+    # becomes an `upscale` x `upscale` block of pixels. The image is produced a block of rows at a time.
+    SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    ROWS_PER_CHUNK = 256  # scanlines compressed between two IDAT chunks
+
+    @staticmethod
+    def _chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    @staticmethod
+    def _pixels(rows: np.ndarray, palette: np.ndarray or None, top: int) -> np.ndarray:
+        # (height, width) grey or (height, width, 3) RGB, uint8. `top` is the largest value of the whole image.
+        if palette is not None:
+            return palette[rows]
+        if top == 0:
+            return np.zeros(rows.shape, dtype=np.uint8)
+        return (rows.astype(np.uint64) * 255 // top).astype(np.uint8)
+
+    @staticmethod
+    def chunks(array: np.ndarray, palette: np.ndarray or None = None, upscale: int = 1, level: int = 6):
+        # the PNG file in pieces, for streaming
+        if upscale < 1:
+            raise ValueError("upscale must be positive!")
+        array = np.asarray(array)
+        if array.ndim != 2:
+            raise ValueError("Need a two-dimensional array!")
+        if array.size == 0:
+            array = np.zeros((1, 1), dtype=np.uint8)  # PNG has no empty images
+        height, width = array.shape
+        color_type = 0 if palette is None else 2
+        if palette is not None:
+            palette = np.asarray(palette, dtype=np.uint8)
+        top = int(array.max())
+
+        yield Png.SIGNATURE
+        yield Png._chunk(b"IHDR", struct.pack(">IIBBBBB", width * upscale, height * upscale, 8, color_type, 0, 0, 0))
+
+        compressor = zlib.compressobj(level)
+        for start in range(0, height, Png.ROWS_PER_CHUNK):
+            pixels = Png._pixels(array[start:start + Png.ROWS_PER_CHUNK], palette, top)
+            pixels = np.repeat(np.repeat(pixels, upscale, axis=0), upscale, axis=1)
+            # filter type 0 in front of every scanline
+            scanlines = np.zeros((pixels.shape[0], 1 + pixels[0].size), dtype=np.uint8)
+            scanlines[:, 1:] = pixels.reshape(pixels.shape[0], -1)
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                yield Png._chunk(b"IDAT", data)
+        yield Png._chunk(b"IDAT", compressor.flush())
+        yield Png._chunk(b"IEND", b"")
+
+    @staticmethod
+    def encode(array: np.ndarray, palette: np.ndarray or None = None, upscale: int = 1, level: int = 6) -> bytes:
+        return b"".join(Png.chunks(array, palette=palette, upscale=upscale, level=level))
@@ -0,0 +1,74 @@
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from categorytheory.DiagramGraph import DiagramGraph, Colors
+
+
+class Svg:
+    # SVG drawing of a DiagramGraph, laid out like to_vis: a row per slice, `scale` pixels apart, boxes as wide as
+    # their wires, braids as thin white τ boxes and strings as dots. The document is produced row by row, the
+    # wires into a row and then its nodes, so the nodes are drawn over the wires.
+    STROKE = "#808080"
+    FILL = "#dcdcdc"
+
+    @staticmethod
+    def _text(x: float, y: float, label: str, size: float) -> str:
+        return '<text x="{:.2f}" y="{:.2f}" font-size="{:.2f}">{}</text>'.format(x, y, size, escape(label))
+
+    @staticmethod
+    def _node(graph: DiagramGraph, node: int, scale: int, label_strings: bool, colormap: dict or None,
+              last_rank: int) -> str:
+        kind, name = graph.kind(node), graph.name(node)
+        x, y = graph.node_x[node] * scale, graph.node_rank[node] * scale
+        width = graph.node_width[node] * scale
+        if kind == "NamedMorphism":
+            tau = DiagramGraph.TAU in name
+            height = scale / 4 if tau else scale / 2
+            label = DiagramGraph.TAU if tau else name
+            return '<g><title>{}</title><rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" rx="{:.2f}" ' \
+                   'fill="{}" stroke="{}"/>{}</g>'.format(escape(name), x - width / 2, y - height / 2, width, height,
+                                                          scale / 10, "white" if tau else Svg.FILL, Svg.STROKE,
+                                                          Svg._text(x, y, label, scale / 5))
+        if kind == "IdentityMorphism" and name != "[]":
+            color = colormap[name] if colormap is not None else Svg.FILL
+            if label_strings or graph.node_rank[node] in (0, last_rank):
+                return '<g><circle cx="{:.2f}" cy="{:.2f}" r="{:.2f}" fill={} stroke="{}"/>{}</g>'.format(
+                    x, y, scale / 8, quoteattr(color), Svg.STROKE, Svg._text(x, y, name, scale / 6))
+            return '<circle cx="{:.2f}" cy="{:.2f}" r="0.25" fill={}/>'.format(x, y, quoteattr(color))
+        return ""
+
+    @staticmethod
+    def chunks(graph: DiagramGraph, scale: int = 100, label_strings: bool = True, color_nodes: bool = False):
+        # the document in pieces, one row of the graph each
+        colormap = Colors() if color_nodes else None
+        margin = scale / 2
+        x = np.frombuffer(graph.node_x, dtype=np.float64)
+        widths = np.frombuffer(graph.node_width, dtype=np.float64)
+        right = float((x + widths / 2).max(initial=0)) * scale
+        bottom = max(graph.rows - 1, 0) * scale
+        last_rank = max(graph.node_rank, default=0)
+
+        yield '<svg xmlns="http://www.w3.org/2000/svg" width="{w:.0f}" height="{h:.0f}" ' \
+              'viewBox="{x:.2f} {y:.2f} {w:.2f} {h:.2f}">\n' \
+              '<style>text {{ text-anchor: middle; dominant-baseline: central; font-family: sans-serif; }}' \
+              '</style>\n'.format(x=graph.offset * scale - margin, y=-margin, w=right - graph.offset * scale + 2 * margin,
+                                 h=bottom + 2 * margin)
+
+        targets = np.frombuffer(graph.edge_target, dtype=np.int32)
+        for rank in range(graph.rows):
+            start, stop = graph.row_range(rank)
+            parts = ['<g class="row">']
+            for j in range(*np.searchsorted(targets, [start, stop]).tolist()):
+                parts.append('<line x1="{:.2f}" y1="{:.2f}" x2="{:.2f}" y2="{:.2f}" stroke="{}"/>'.format(
+                    graph.edge_source_x[j] * scale, graph.node_rank[graph.edge_source[j]] * scale,
+                    graph.edge_target_x[j] * scale, rank * scale, Svg.STROKE))
+            for i in range(start, stop):
+                parts.append(Svg._node(graph, i, scale, label_strings, colormap, last_rank))
+            parts.append("</g>\n")
+            yield "".join(parts)
+        yield "</svg>\n"
+
+    @staticmethod
+    def render(graph: DiagramGraph, scale: int = 100, label_strings: bool = True, color_nodes: bool = False) -> str:
+        return "".join(Svg.chunks(graph, scale=scale, label_strings=label_strings, color_nodes=color_nodes))
@@ -1,6 +1,8 @@
-from sympy.categories import Object, Morphism, CompositeMorphism
+import numpy as np
 
 from categorytheory.MonoidalCategory import MonoidalCategory, MonoidalObject, MonoidalMorphism, NamedMorphism, IdentityMorphism
+from categorytheory.Permutation import Permutation
+from categorytheory.WireAlphabet import WireAlphabet
 
 
 class SymmetricMonoidalCategory(MonoidalCategory):
@@ -8,56 +10,72 @@ class SymmetricMonoidalCategory(MonoidalCategory):
         return MonoidalCategory.__new__(cls, name, objects, commutative_diagrams)
 
     @staticmethod
-    def swap(x: Object, y: Object) -> MonoidalMorphism:
+    def swap(x: str, y: str) -> MonoidalMorphism:
+        braid = SymmetricMonoidalCategory.braid(x, y)
+        return MonoidalMorphism.from_parts((braid,), braid.domain, braid.codomain, is_swap=True)
+
+    @staticmethod
+    def braid(x: str, y: str) -> NamedMorphism:
+        # the NamedMorphism in swap(x, y), braid layers tensor it with identities
         A = MonoidalObject(x, y)
         B = MonoidalObject(y, x)
-        name = "\u03C4({x.name}, {y.name})".format(x=x, y=y)  # \u03C4 = Greek small letter tau
-        return MonoidalMorphism(NamedMorphism(domain=A, codomain=B, name=name), is_swap=True)
+        # \u03C4 = Greek small letter tau
+        name = "\u03C4({}, {})".format(MonoidalObject(x).name, MonoidalObject(y).name)
+        return NamedMorphism(domain=A, codomain=B, name=name)
 
     @staticmethod
     def _check_braid_identity_(t1: MonoidalMorphism, t2: MonoidalMorphism):
         if not (t1.is_swap and t2.is_swap):  # both must be swaps
             return False
 
-        try:
-            composed = CompositeMorphism(t1, t2)
-        except ValueError:
-            return False
-
-        if composed.domain == composed.codomain:
-            return True
-        return False
+        # t1 * t2 must compose and come back to where it started
+        return t1.codomain == t2.domain and t1.domain == t2.codomain
 
     @staticmethod
-    def apply_braid_identity(t1: MonoidalMorphism, t2: MonoidalMorphism) -> Morphism:
+    def apply_braid_identity(t1: MonoidalMorphism, t2: MonoidalMorphism):
         if SymmetricMonoidalCategory._check_braid_identity_(t1, t2):
             return IdentityMorphism(domain=t1.domain)
-        else:
-            try:
-                composite = CompositeMorphism(t1, t2)
-                return composite  # hmmm... should it return composite or list of original morphisms?
-            except ValueError:
-                raise ValueError("Cannot compose morphisms and does not satisfy braid identity!")
+        if t1.codomain != t2.domain:
+            raise ValueError("Cannot compose morphisms and does not satisfy braid identity!")
+        # hmmm... should it return composite or list of original morphisms?
+        from sympy.categories import CompositeMorphism
+        return CompositeMorphism(t1.to_sympy(), t2.to_sympy())
 
     @staticmethod
-    def simplify(swaps: list) -> list:
+    def simplify(swaps: list, objects: list, positions: list or None = None) -> list:
         # Start:    A B C D E
         # End:      A B E C D
-        # In cycle notation, swaps = [(C D), (D C), (D E), (C E)]
-        # simplify(swaps) = [(D E), (C E)]
+        # swaps = [(C D), (D C), (D E), (C E)]
+        # simplify(swaps, [A, B, C, D, E]) = [(D E), (C E)]
+        #
+        # The swaps are followed on the wires in `objects`, where the first swap starts, and replaced by the shortest
+        # word for the same permutation: every pair of wires crosses at most once and repeated wires never cross.
+        # A swap acts on the one pair of neighbouring wires with its names. When wire names repeat, more than one pair
+        # can match: then positions[i], the position of the left wire of swaps[i], says which one.
+        wires = MonoidalObject(*objects).tuple_view
+        alphabet = WireAlphabet()
+        codes = alphabet.encode(wires).tolist()
 
-        if len(swaps) < 2:
-            # nothing to check, need at least two swaps to check braid identity
-            return swaps
+        # follow the swaps on wire codes to find where every wire ends up
+        current = list(codes)
+        for i, swap in enumerate(swaps):
+            left, right = (alphabet.code(name) for name in swap.domain.names)
+            if positions is not None:
+                k = positions[i]
+                if not (0 <= k < len(current) - 1 and current[k] == left and current[k + 1] == right):
+                    raise ValueError("{} does not act on the wires at {} and {}!".format(swap.name, k, k + 1))
+            else:
+                matches = [k for k in range(len(current) - 1) if current[k] == left and current[k + 1] == right]
+                if not matches:
+                    raise ValueError("{} does not act on neighbouring wires!".format(swap.name))
+                if len(matches) > 1 and left != right:  # swapping two wires of the same name changes nothing
+                    raise ValueError("{} can act on the wires at {}, positions are needed!".format(swap.name, matches))
+                k = matches[0]
+            current[k], current[k + 1] = current[k + 1], current[k]
 
         new_swaps = []
-        swap_1 = swaps.pop(0)
-        while swaps:  # while there are still swaps that haven't been popped
-            swap_2 = swaps.pop(0)
-            if SymmetricMonoidalCategory._check_braid_identity_(swap_1, swap_2):
-                swap_1 = swaps.pop(0)  # if they make identity, move on to next swap
-            else:
-                new_swaps.append(swap_1)
-                swap_1 = swap_2
-        new_swaps.append(swap_1)
+        wires = list(wires)
+        for k in Permutation(WireAlphabet.permutation(np.asarray(codes), np.asarray(current))).transpositions():
+            new_swaps.append(SymmetricMonoidalCategory.swap(wires[k], wires[k + 1]))
+            wires[k], wires[k + 1] = wires[k + 1], wires[k]
         return new_swaps
@@ -0,0 +1,72 @@
+from typing import Iterable
+
+import numpy as np
+
+from categorytheory.MonoidalCategory import MonoidalObject, IdentityMorphism, atom_name
+
+
+class WireAlphabet:
+    # Symbol table for wire names: every object name gets a small integer code. Diagrams keep their
+    # wires as tuples of names, a boundary is only encoded as an int32 array to work out the
+    # permutation between two of them, and DiagramGraph stores node names by code.
+    dtype = np.int32
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._codes = dict()
+        self._names = []
+        for name in names:
+            self.code(name)
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+        return code
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    @staticmethod
+    def wire_name(wire) -> str:
+        # strings are identity morphisms on a single object, see Diagram.make_strings
+        if isinstance(wire, IdentityMorphism):
+            return wire.domain.name
+        if isinstance(wire, MonoidalObject):
+            return wire.name
+        name = atom_name(wire)
+        return str(wire) if name is None else name
+
+    def encode(self, wires) -> np.ndarray:
+        if isinstance(wires, MonoidalObject):
+            names = wires.names
+        else:
+            names = [WireAlphabet.wire_name(w) for w in wires]
+        return np.fromiter((self.code(n) for n in names), dtype=self.dtype, count=len(names))
+
+    def decode(self, codes) -> MonoidalObject:
+        return MonoidalObject(*[self._names[c] for c in codes])
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._codes
+
+    @staticmethod
+    def permutation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        # p[i] is the position in `b` of the wire at position i in `a`. Repeated wires keep their
+        # relative order, the k-th occurrence in `a` goes to the k-th occurrence in `b`.
+        if len(a) != len(b):
+            raise ValueError("Both lists must be equal lengths!")
+        order_a = np.argsort(a, kind="stable")
+        order_b = np.argsort(b, kind="stable")
+        if not np.array_equal(a[order_a], b[order_b]):
+            raise ValueError("Both lists must contain the same values!")
+        p = np.empty(len(a), dtype=np.intp)
+        p[order_a] = order_b
+        return p
@@ -0,0 +1,72 @@
+import unittest
+
+from categorytheory.CompositionCache import CompositionCache
+from categorytheory.Diagram import Diagram, StringDiagram
+from categorytheory.MonoidalCategory import MonoidalObject, NamedMorphism
+
+
+class TestCompositionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4", "foo"),
+                                       name="f"))
+        self.g = Diagram(NamedMorphism(domain=MonoidalObject("3", "x", "4"), codomain=MonoidalObject("6"), name="g"))
+        self.h = Diagram(NamedMorphism(domain=MonoidalObject("y", "6", "foo"), codomain=MonoidalObject("7"), name="h"))
+        self.i = Diagram(NamedMorphism(domain=MonoidalObject("7"), codomain=MonoidalObject("8"), name="i"))
+
+    def test_compose(self):
+        cache = CompositionCache()
+        diagrams = [self.f, self.g, self.h]
+        sd = cache.compose(diagrams)
+        self.assertEqual(sd, StringDiagram.compose_many(diagrams))
+        self.assertEqual(cache.info().misses, 1)
+
+        self.assertIs(cache.compose(diagrams), sd)
+        self.assertEqual(cache.info().hits, 1)
+        self.assertIn(diagrams, cache)
+
+        single = cache.compose([self.f])
+        self.assertIsInstance(single, StringDiagram)
+        self.assertEqual(single.diagrams, [self.f])
+        self.assertRaises(ValueError, cache.compose, [])
+
+    def test_prefix(self):
+        # a cached prefix is not extended, the diagram only depends on the list
+        cache = CompositionCache()
+        cache.compose([self.f, self.g])
+        full = [self.f, self.g, self.h, self.i]
+        sd = cache.compose(full)
+        self.assertEqual(sd, StringDiagram.compose_many(full))
+        self.assertEqual(sd, CompositionCache().compose(full))
+        self.assertEqual(cache.info().misses, 2)
+        self.assertEqual(len(cache), 2)
+
+    def test_eviction(self):
+        cache = CompositionCache(maxsize=2)
+        cache.compose([self.f])
+        cache.compose([self.f, self.g])
+        cache.compose([self.f])  # most recently used, so f * g is the least recently used
+        cache.compose([self.f, self.g, self.h])
+        self.assertIn([self.f], cache)
+        self.assertNotIn([self.f, self.g], cache)
+        self.assertIn([self.f, self.g, self.h], cache)
+        self.assertEqual(cache.info(), (1, 3, 1, 2, 2))
+
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 0, 2, 0))
+        self.assertRaises(ValueError, CompositionCache, 0)
+
+    def test_pack_braids(self):
+        cache = CompositionCache()
+        diagrams = [self.f, self.g]
+        plain = cache.compose(diagrams)
+        packed = cache.compose(diagrams, pack_braids=True)
+        self.assertIsNot(plain, packed)
+        self.assertEqual(packed, StringDiagram.compose_many(diagrams, pack_braids=True))
+        self.assertIn((diagrams, True), cache)
+        self.assertNotIn(([self.f], True), cache)
+        self.assertIn((diagrams, False), cache)
+        self.assertNotEqual(CompositionCache.sequence_keys(diagrams), CompositionCache.sequence_keys(diagrams, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
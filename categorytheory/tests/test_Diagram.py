@@ -1,12 +1,16 @@
 import json
 import os
+import random
+import time
 import unittest
 from json.decoder import JSONDecodeError
 
+import numpy as np
 from sympy.categories import Object, CompositeMorphism
 
 from categorytheory.Diagram import Diagram, StringDiagram
 from categorytheory.MonoidalCategory import MonoidalObject, MonoidalMorphism, NamedMorphism, IdentityMorphism
+from categorytheory.SymmetricMonoidalCategory import SymmetricMonoidalCategory
 
 
 class TestDiagram(unittest.TestCase):
@@ -23,11 +27,11 @@ class TestDiagram(unittest.TestCase):
     def test_asymm_diff(self):
         # base = {3, 4}, elements = {3, 4, 5} --> [5]
         diff = Diagram.asymm_diff(base=self.B.objects, elements=self.C.objects)
-        self.assertEqual(diff, [Object("5")])
+        self.assertEqual(diff, ["5"])
 
         # base = {3, 4}, elements = {3, 4, 4} --> [4]
         diff = Diagram.asymm_diff(base=self.B.objects, elements=self.E.objects)
-        self.assertEqual(diff, [Object("4")])
+        self.assertEqual(diff, ["4"])
 
         # base = {3, 4}, elements = {3, 4} --> []
         diff = Diagram.asymm_diff(base=self.B.objects, elements=self.B.objects)
@@ -88,14 +92,22 @@ class TestDiagram(unittest.TestCase):
         true_bottom_strings = Diagram.make_strings(objects=[MonoidalObject("a", "b", "e", "c", "d")])
         self.assertEqual(bottom_strings, true_bottom_strings)
 
+    def test_weave_pattern_duplicates(self):
+        # top:      [a x b]         =>      [x x a x b]
+        # bottom:   [x x a x b]
+        top_strings = Diagram.make_strings(objects=[MonoidalObject("a", "x", "b")])
+        bottom_strings = Diagram.make_strings(objects=[MonoidalObject("x", "x", "a", "x", "b")])
+        self.assertEqual(Diagram.yarn_pattern(cloth=top_strings, yarn=bottom_strings),
+                         [(IdentityMorphism(MonoidalObject("x")), True), (IdentityMorphism(MonoidalObject("x")), True)])
+        new_top = Diagram.weave_pattern(cloth=top_strings, yarn=bottom_strings, in_place=False)
+        self.assertEqual(new_top, Diagram.make_strings(objects=[MonoidalObject("x", "x", "a", "x", "b")]))
+        self.assertEqual(top_strings, Diagram.make_strings(objects=[MonoidalObject("a", "x", "b")]))
+
     def test_compute_swaps(self):
         a = MonoidalObject("a", "b", "c", "d", "e").objects
         b = MonoidalObject("a", "b", "e", "c", "d").objects
         swaps = Diagram.compute_swaps(a, b)
-        self.assertEqual(swaps, [(Object("c"), Object("d")),
-                                 (Object("d"), Object("c")),
-                                 (Object("d"), Object("e")),
-                                 (Object("c"), Object("e"))])
+        self.assertEqual(swaps, [("d", "e"), ("c", "e")])
 
         b = MonoidalObject("a", "b", "e", "c").objects
         self.assertRaises(ValueError, Diagram.compute_swaps, a, b)
@@ -113,17 +125,38 @@ class TestDiagram(unittest.TestCase):
 
         # Test
         try:
-            CompositeMorphism([d.morphism for d in fg_with_braids])
+            CompositeMorphism([d.morphism.to_sympy() for d in fg_with_braids])
             success = True
         except ValueError:
             success = False
         self.assertTrue(success)
 
+    def test_add_braids_duplicates(self):
+        # braids are placed by position, repeated wires must not be confused
+        f = Diagram(NamedMorphism(domain=MonoidalObject("foo"), codomain=MonoidalObject("a", "b", "a", "c"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("c", "a", "a", "b"), codomain=MonoidalObject("bar"), name="g"))
+        fg_with_braids = Diagram.add_braids(f, g)
+        StringDiagram(fg_with_braids)
+        self.assertEqual(len(fg_with_braids) - 2, Diagram.compute_permutation(f.codomain, g.domain).inversions())
+
+    def test_add_braids_packed(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("foo"), codomain=MonoidalObject("a", "b", "c", "d"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("b", "a", "d", "c"), codomain=MonoidalObject("bar"), name="g"))
+        fg_with_braids = Diagram.add_braids(f, g, pack_braids=True)
+        StringDiagram(fg_with_braids)
+        self.assertEqual(len(fg_with_braids), 3)
+        self.assertEqual(fg_with_braids[1].name, "τ(a, b) @ τ(c, d)")
+        self.assertEqual(len(Diagram.add_braids(f, g)), 4)
+
+        k = f.compose(g, pack_braids=True)
+        self.assertEqual(len(k), 3)
+        self.assertEqual(len(StringDiagram.compose_many([f, g], pack_braids=True)), 3)
+
     def test_compose(self):
         f = Diagram(self.f)
         g = Diagram(self.g)
         h = f * g
-        h_morphism = CompositeMorphism(h.morphisms)
+        h_morphism = h.as_morphism()
         self.assertEqual(h_morphism.domain, h.domain)
         self.assertEqual(h_morphism.codomain, h.codomain)
 
@@ -181,8 +214,8 @@ class TestDiagram(unittest.TestCase):
         f = Diagram(self.f)
         f_dict = dict(f)
         self.assertEqual(f_dict["name"], "f")
-        self.assertEqual(f_dict["domain"], [Object("1"), Object("2")])
-        self.assertEqual(f_dict["codomain"], [Object("3"), Object("4")])
+        self.assertEqual(f_dict["domain"], ["1", "2"])
+        self.assertEqual(f_dict["codomain"], ["3", "4"])
         self.assertEqual(f_dict["linear_syntax"], "f: 1 @ 2 -> 3 @ 4")
 
     def test_to_json(self):
@@ -190,6 +223,32 @@ class TestDiagram(unittest.TestCase):
         f_json = f.to_json()
         self.assertIsNotNone(json.loads(f_json))
 
+    def test_tensor(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("b"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("x"), codomain=MonoidalObject("y", "z"), name="g"))
+        k = f @ g
+        self.assertIsInstance(k, Diagram)
+        self.assertEqual(k.name, "f @ g")
+        self.assertEqual(k.domain, MonoidalObject("a", "x"))
+        self.assertEqual(k.codomain, MonoidalObject("b", "y", "z"))
+        self.assertRaises(TypeError, f.tensor, "g")
+
+    def test_fingerprint(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("b", "c"), name="f"))
+        self.assertEqual(f.fingerprint, "61fede7b7dbf93ed9c1074b88cb2ed21")  # the same in every process
+        self.assertEqual(f, Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("b", "c"),
+                                                  name="f"), name="other label"))
+        self.assertNotEqual(f, Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("c", "b"),
+                                                     name="f")))
+        self.assertNotEqual(f, f.inverse())
+
+        id_ab = Diagram(IdentityMorphism(MonoidalObject("a", "b")))
+        id_a_id_b = Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("a")),
+                                             IdentityMorphism(MonoidalObject("b"))))
+        self.assertEqual(id_ab, id_a_id_b)
+        self.assertEqual(hash(id_ab), hash(id_a_id_b))
+        self.assertEqual(len({id_ab, id_a_id_b, f}), 2)
+
     def test_slices(self):
         f = Diagram(self.f)
         f_slices = f.slices()
@@ -202,6 +261,15 @@ class TestDiagram(unittest.TestCase):
         self.assertEqual(len(f_edges), 4)
         self.assertEqual(f_size, (3, 2))
 
+    def test_as_graph_duplicates(self):
+        # h: 3 @ 4 @ 4 -> 6 @ 7, each 4 is wired to a different output of the slice above
+        h = NamedMorphism(domain=self.E, codomain=self.D, name="h")
+        k = NamedMorphism(domain=MonoidalObject("4"), codomain=MonoidalObject("4"), name="k")
+        d = Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("3")), k, k))
+        nodes, edges = Diagram.to_graph_from_slices(d.slices()[:-1] + [[h]])[:2]
+        sources = sorted(e["source_node"] for e in edges.values() if e["target_node"] == "h_(2)_(0)")
+        self.assertEqual(sources, ["id_{3}_(1)_(0)", "k_(1)_(1)", "k_(1)_(2)"])
+
     def test_to_vis(self):
         f = Diagram(self.f)
         filename = os.path.join(os.path.dirname(__file__), "test_data.json")
@@ -209,7 +277,8 @@ class TestDiagram(unittest.TestCase):
         self.assertIsNotNone(json.dumps(vis_data))
 
     def tearDown(self) -> None:
-        filenames = [os.path.join(os.path.dirname(__file__), "test_data.json")]
+        filenames = [os.path.join(os.path.dirname(__file__), "test_data.json"),
+                     os.path.join(os.path.dirname(__file__), "test_data.npz")]
         for f in filenames:
             if os.path.exists(f):
                 os.remove(f)
@@ -267,7 +336,13 @@ class TestStringDiagram(unittest.TestCase):
 
     def test_as_morphism(self):
         sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
-        self.assertEqual(sd.as_morphism(), CompositeMorphism(self.m1, self.m2))
+        self.assertEqual(sd.as_morphism(), CompositeMorphism(self.m1.to_sympy(), self.m2.to_sympy()))
+
+    def test_from_sympy(self):
+        sd = StringDiagram(diagrams=[self.d1, self.d2])
+        sd_prime = StringDiagram.from_sympy(sd.as_morphism())
+        self.assertEqual(sd_prime.morphisms, [self.m1, self.m2])
+        self.assertEqual(sd_prime.linear_syntax, sd.linear_syntax)
 
     def test_len(self):
         sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
@@ -378,6 +453,232 @@ class TestStringDiagram(unittest.TestCase):
         self.assertEqual(k.domain, MonoidalObject("1", "2", "5", "8"))
         self.assertEqual(k.codomain, MonoidalObject("9"))
 
+    def test_compose_incremental(self):
+        # appending one diagram at a time must match weaving the whole chain down and then up
+        f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4", "foo"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("3", "x", "4"), codomain=MonoidalObject("6"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("y", "6", "foo"), codomain=MonoidalObject("7", "8"), name="h"))
+        i = Diagram(NamedMorphism(domain=MonoidalObject("8", "z", "7"), codomain=MonoidalObject("bar"), name="i"))
+
+        woven_down = StringDiagram.weave(diagrams=[f, g, h, i])
+        woven_down = [d.inverse() for d in reversed(woven_down)]
+        woven_up = StringDiagram.weave(diagrams=woven_down)
+        expected = StringDiagram([d.inverse() for d in reversed(woven_up)])
+
+        k = f * g * h * i
+        self.assertEqual(k.linear_syntax, expected.linear_syntax)
+        self.assertEqual(k.domain, expected.domain)
+        self.assertEqual(k.codomain, expected.codomain)
+
+    def test_compose_many(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4", "foo"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("3", "4", "5"), codomain=MonoidalObject("6", "7"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("6", "7", "8"), codomain=MonoidalObject("bar"), name="h"))
+        i = Diagram(NamedMorphism(domain=MonoidalObject("bar", "foo"), codomain=MonoidalObject("9"), name="i"))
+
+        e = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4"), name="e"))
+        k = StringDiagram.compose_many([e, g, h])
+        self.assertEqual(k.linear_syntax, "e @ id_{5} @ id_{8} * g @ id_{8} * h")
+        self.assertEqual(k.linear_syntax, (e * g * h).linear_syntax)
+
+        k = StringDiagram.compose_many([f, g, StringDiagram([h]), i])
+        self.assertEqual(k.domain, MonoidalObject("1", "2", "5", "8"))
+        self.assertEqual(k.codomain, MonoidalObject("9"))
+        StringDiagram(k.diagrams)  # every neighbouring pair composes
+
+        self.assertEqual(StringDiagram.compose_many([f]).diagrams, [f])
+        self.assertRaises(ValueError, StringDiagram.compose_many, [])
+        self.assertRaises(TypeError, StringDiagram.compose_many, [f, "g"])
+
+    def test_compose_parallel(self):
+        # the c1 example, 30 arrows with strings passing by most of them, braided in chunks of 4 boundaries
+        filename = os.path.join(os.path.dirname(__file__), "..", "..", "wsgi", "static", "data", "examples", "c1.json")
+        with open(filename) as infile:
+            data = json.load(infile)
+        diagrams = [Diagram(NamedMorphism(domain=MonoidalObject(*data[key].get("input", [])),
+                                          codomain=MonoidalObject(*data[key].get("output", [])),
+                                          name=data[key]["name"]))
+                    for key in data["main"]["compose"]]
+
+        expected = StringDiagram.compose_many(diagrams)
+        k = StringDiagram.compose_parallel(diagrams, chunk_size=4, max_workers=2)
+        self.assertEqual(k, expected)
+        self.assertEqual(len(k), len(expected))
+        self.assertEqual((k.domain, k.codomain), (expected.domain, expected.codomain))
+        self.assertEqual(StringDiagram.compose_parallel(diagrams, chunk_size=4, max_workers=2, pack_braids=True),
+                         StringDiagram.compose_many(diagrams, pack_braids=True))
+        self.assertEqual(StringDiagram.compose_parallel(diagrams[:3]), StringDiagram.compose_many(diagrams[:3]))
+        self.assertRaises(ValueError, StringDiagram.compose_parallel, diagrams, 0)
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 4, "the process pool only pays off with several CPUs")
+    def test_compose_parallel_faster(self):
+        # 20000 arrows taking wires near the right end of 60: many boundaries with a few braids each, so
+        # compose_many spends a good part of its time on permutations, which compose_parallel hands to the pool
+        rng = random.Random(0)
+        live = ["w{}".format(i) for i in range(60)]
+        diagrams = []
+        for i in range(20000):
+            ins = rng.sample(live[-5:], rng.randint(1, 2))
+            outs = ["f{}_{}".format(i, j) for j in range(len(ins))]
+            live = [w for w in live if w not in ins] + outs
+            diagrams.append(Diagram(NamedMorphism(domain=MonoidalObject(*ins), codomain=MonoidalObject(*outs),
+                                                  name="f{}".format(i))))
+
+        def best_of_three(compose):
+            best = None
+            for _ in range(3):
+                start = time.perf_counter()
+                sd = compose(diagrams)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return best, sd
+
+        serial, expected = best_of_three(StringDiagram.compose_many)
+        parallel, k = best_of_three(StringDiagram.compose_parallel)
+        self.assertEqual(k, expected)
+        self.assertLess(parallel, serial)
+
+    def test_pickle(self):
+        import pickle
+        sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
+        for k in [sd, sd * Diagram(SymmetricMonoidalCategory.swap(Object("bar"), Object("x")))]:
+            k_prime = pickle.loads(pickle.dumps(k))
+            self.assertEqual(k_prime.name, k.name)
+            self.assertEqual(k_prime.morphisms, k.morphisms)
+            self.assertEqual([d.name for d in k_prime.diagrams], [d.name for d in k.diagrams])
+        self.assertEqual(StringDiagram.from_state(sd.to_state()).linear_syntax, sd.linear_syntax)
+
+    def test_save_load(self):
+        import io
+        sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
+        for k in [sd, sd * Diagram(SymmetricMonoidalCategory.swap(Object("bar"), Object("x")))]:
+            f = io.BytesIO()
+            k.save(f)
+            f.seek(0)
+            k_prime = StringDiagram.load(f)
+            self.assertEqual(k_prime, k)
+            self.assertEqual(k_prime.name, k.name)
+            self.assertEqual([d.name for d in k_prime.diagrams], [d.name for d in k.diagrams])
+            self.assertEqual([d.morphism.is_swap for d in k_prime.diagrams if isinstance(d.morphism, MonoidalMorphism)],
+                             [d.morphism.is_swap for d in k.diagrams if isinstance(d.morphism, MonoidalMorphism)])
+
+        filename = os.path.join(os.path.dirname(__file__), "test_data.npz")
+        sd.save(filename)
+        with np.load(filename, allow_pickle=False) as data:
+            self.assertEqual(data["layer_kind"].tolist(), [1, 0])
+            self.assertEqual(data["morphism_name"].tolist()[0], -1)
+        self.assertEqual(StringDiagram.load(filename).linear_syntax, "id_{f} @ f * g")
+
+        # without the suffix, the name given to save also loads
+        filename = os.path.join(os.path.dirname(__file__), "test_data")
+        sd.save(filename)
+        self.assertTrue(os.path.exists(filename + ".npz"))
+        self.assertEqual(StringDiagram.load(filename), sd)
+
+    def test_compact(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("b"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("c"), codomain=MonoidalObject("d"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("b", "d"), codomain=MonoidalObject("e"), name="h"))
+
+        # f and g touch different strings, so they slide next to each other
+        k = StringDiagram([Diagram(MonoidalMorphism(f.morphism, IdentityMorphism(MonoidalObject("c")))),
+                           Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("b")), g.morphism)), h])
+        k_prime = k.compact()
+        self.assertEqual(k_prime.linear_syntax, "f @ g * h")
+        self.assertEqual(k_prime.domain, k.domain)
+        self.assertEqual(k_prime.codomain, k.codomain)
+
+        # g depends on f, nothing moves
+        g = Diagram(NamedMorphism(domain=MonoidalObject("b"), codomain=MonoidalObject("d"), name="g"))
+        k = f * g
+        self.assertEqual(k.compact().linear_syntax, k.linear_syntax)
+        self.assertEqual(k.compact().diagrams, k.diagrams)  # untouched layers are kept
+
+        # a box without inputs floats to the top, and identity layers are dropped
+        u = Diagram(NamedMorphism(domain=MonoidalObject(), codomain=MonoidalObject("u"), name="u"))
+        i = Diagram(IdentityMorphism(MonoidalObject("b", "u")))
+        k = StringDiagram([f, Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("b")), u.morphism)), i])
+        self.assertEqual(k.compact().linear_syntax, "f @ u")
+
+    def test_compact_blocked(self):
+        # x has no outputs and sits between the input strings of g, so g can not slide past it
+        f = NamedMorphism(domain=MonoidalObject("a", "b", "c"), codomain=MonoidalObject("a", "b", "c"), name="f")
+        x = NamedMorphism(domain=MonoidalObject("e"), codomain=MonoidalObject(), name="x")
+        g = NamedMorphism(domain=MonoidalObject("a", "c"), codomain=MonoidalObject("d"), name="g")
+        k = StringDiagram([Diagram(f),
+                           Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("a")), NamedMorphism(
+                               domain=MonoidalObject("b"), codomain=MonoidalObject("e"), name="y"),
+                                                    IdentityMorphism(MonoidalObject("c")))),
+                           Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("a")), x,
+                                                    IdentityMorphism(MonoidalObject("c")))),
+                           Diagram(g)])
+        self.assertEqual(k.compact().linear_syntax, k.linear_syntax)
+
+    def test_compact_sources_and_sinks(self):
+        # v slides up past q and the boxes without outputs above it. q stays left of v's output, so g, taking
+        # that output and the string right of it, slides up too.
+        a, aa = MonoidalObject("a"), MonoidalObject("a", "a")
+        i = IdentityMorphism(a)
+        u = NamedMorphism(domain=MonoidalObject(), codomain=aa, name="u")
+        f = NamedMorphism(domain=a, codomain=aa, name="f")
+        x = NamedMorphism(domain=a, codomain=MonoidalObject(), name="x")
+        y = NamedMorphism(domain=a, codomain=MonoidalObject(), name="y")
+        p = NamedMorphism(domain=a, codomain=MonoidalObject(), name="p")
+        q = NamedMorphism(domain=aa, codomain=MonoidalObject(), name="q")
+        v = NamedMorphism(domain=MonoidalObject(), codomain=a, name="v")
+        g = NamedMorphism(domain=aa, codomain=a, name="g")
+        k = StringDiagram([Diagram(MonoidalMorphism(u, i, i, i)), Diagram(MonoidalMorphism(i, f, i, x, y)),
+                           Diagram(MonoidalMorphism(p, q, v, i)), Diagram(g)])
+        k_prime = k.compact()
+        self.assertEqual(k_prime.linear_syntax, "u @ v @ id_{a} @ x @ y * p @ f @ g * q @ id_{a}")
+        self.assertEqual(k_prime.domain, k.domain)
+        self.assertEqual(k_prime.codomain, k.codomain)
+
+    def test_tensor(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("a"), codomain=MonoidalObject("b"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("b"), codomain=MonoidalObject("c", "d"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("x"), codomain=MonoidalObject("y"), name="h"))
+
+        k = (f * g) @ h
+        self.assertEqual(k.linear_syntax, "f @ h * g @ id_{y}")
+        self.assertEqual(k.domain, MonoidalObject("a", "x"))
+        self.assertEqual(k.codomain, MonoidalObject("c", "d", "y"))
+        StringDiagram(k.diagrams)
+
+        k = h @ (f * g)
+        self.assertEqual(k.linear_syntax, "h @ f * id_{y} @ g")
+        self.assertEqual((h @ (f * g)).linear_syntax, StringDiagram([h]).tensor(f * g).linear_syntax)
+
+        k = (f * g) @ (f * g) @ h
+        self.assertEqual(len(k), 2)
+        self.assertEqual(k.codomain, MonoidalObject("c", "d", "c", "d", "y"))
+        self.assertRaises(TypeError, (f * g).tensor, "h")
+
+    def test_fingerprint(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4", "foo"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("3", "x", "4"), codomain=MonoidalObject("6"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("y", "6", "foo"), codomain=MonoidalObject("7"), name="h"))
+
+        k = f * g * h
+        self.assertEqual(k, StringDiagram(k.diagrams, name="same structure"))
+        self.assertEqual(hash(k), hash(StringDiagram(k.diagrams)))
+        self.assertNotEqual(k, f * g)
+
+        # composing reuses the digests of the layers it did not touch
+        fg = f * g
+        fg.digest()
+        fgh = fg * h
+        self.assertEqual(fgh._chain, [])  # h needs y, which is woven all the way to the top
+        self.assertEqual(fgh.fingerprint, k.fingerprint)
+        i = Diagram(NamedMorphism(domain=MonoidalObject("7"), codomain=MonoidalObject("8"), name="i"))
+        fghi = fgh * i
+        self.assertEqual(fghi._chain, fgh._chain[:len(fghi._chain)])
+        self.assertGreater(len(fghi._chain), 0)
+        self.assertEqual(fghi, StringDiagram(fghi.diagrams))
+
+        import pickle
+        self.assertEqual(pickle.loads(pickle.dumps(k)).fingerprint, k.fingerprint)
+
     def test_as_graph(self):
         sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
         sd_nodes, sd_edges, sd_size = sd.as_graph()
@@ -385,14 +686,59 @@ class TestStringDiagram(unittest.TestCase):
         self.assertEqual(len(sd_edges), 13)
         self.assertEqual(sd_size, (5, 5))
 
+    def test_graph_incremental(self):
+        # composing onto a drawn diagram reuses the rows of the layers that are not re-woven
+        f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("3", "4"), codomain=MonoidalObject("5"), name="g"))
+        h = Diagram(NamedMorphism(domain=MonoidalObject("5"), codomain=MonoidalObject("6", "7"), name="h"))
+        i = Diagram(NamedMorphism(domain=MonoidalObject("6", "7"), codomain=MonoidalObject("8"), name="i"))
+
+        fg = f * g
+        self.assertIs(fg.graph(), fg.graph())
+        k = fg
+        for d in (h, i):
+            k = k * d
+            self.assertIsNotNone(k._graph_base)
+            graph = k.graph()
+            self.assertIsNone(k._graph_base)
+            expected = Diagram.graph_from_slices(k.slices())
+            self.assertEqual(list(graph.nodes.items()), list(expected.nodes.items()))
+            self.assertEqual(list(graph.edges.items()), list(expected.edges.items()))
+            self.assertEqual(graph.size, expected.size)
+        self.assertEqual(fg.graph().size, (5, 2))  # the graph it was copied from is unchanged
+
     def test_as_vis(self):
         sd = StringDiagram(diagrams=[self.d1, self.d2], name="MyStringDiagram")
         filename = os.path.join(os.path.dirname(__file__), "test_data.json")
         sd_vis_data = sd.to_vis(filename=filename)
         self.assertIsNotNone(json.dumps(sd_vis_data))
 
+    def test_iter_slices(self):
+        sd = StringDiagram(diagrams=[self.d1, self.d2])
+        self.assertEqual(list(sd.iter_slices()), sd.slices())
+        self.assertEqual(len(sd.slices()), 5)
+
+    def test_iter_graph(self):
+        sd = StringDiagram(diagrams=[self.d1, self.d2])
+        graphs = list(Diagram.iter_graph(sd.iter_slices()))
+        self.assertEqual([g.rows for g in graphs], [1, 2, 3, 4, 5])
+        # rows of 2, 2, 5, 1 and 1 nodes, only the row above is kept
+        self.assertEqual([g.node_count() for g in graphs], [2, 4, 7, 6, 2])
+        self.assertEqual(sum(g.edge_count() for g in graphs), len(sd.as_graph()[1]))
+
+    def test_iter_vis(self):
+        # the same elements as to_vis, row by row
+        sd = StringDiagram(diagrams=[self.d1, self.d2])
+        for label_strings, color_nodes in ((True, False), (False, True)):
+            expected = sd.to_vis(filename=None, label_strings=label_strings, color_nodes=color_nodes)
+            elements = list(sd.iter_vis(label_strings=label_strings, color_nodes=color_nodes))
+            self.assertCountEqual([json.dumps(c) for c in elements], [json.dumps(c) for c in expected])
+        groups = [c["group"] for c in sd.iter_vis()]
+        self.assertEqual(groups[:7], ["nodes", "nodes", "nodes", "nodes", "edges", "edges", "nodes"])
+
     def tearDown(self) -> None:
-        filenames = [os.path.join(os.path.dirname(__file__), "test_data.json")]
+        filenames = [os.path.join(os.path.dirname(__file__), "test_data.json"),
+                     os.path.join(os.path.dirname(__file__), "test_data.npz")]
         for f in filenames:
             if os.path.exists(f):
                 os.remove(f)
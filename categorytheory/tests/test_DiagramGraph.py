@@ -0,0 +1,154 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from categorytheory.Diagram import Diagram
+from categorytheory.DiagramGraph import DiagramGraph
+from categorytheory.MonoidalCategory import MonoidalObject, MonoidalMorphism, NamedMorphism, IdentityMorphism
+
+
+class TestDiagramGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        self.f = NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4"), name="f")
+        self.graph = Diagram(self.f).graph()
+
+    def test_arrays(self):
+        # [id(1) id(2)], [f], [id(3) id(4)]
+        self.assertEqual(self.graph.size, (3, 2))
+        self.assertEqual(self.graph.node_count(), 5)
+        self.assertEqual(self.graph.edge_count(), 4)
+        self.assertEqual(self.graph.node_rank.tolist(), [0, 0, 1, 2, 2])
+        self.assertEqual(self.graph.node_col.tolist(), [0, 1, 0, 0, 1])
+        self.assertEqual(self.graph.node_x.tolist(), [0.5, 1.5, 1.0, 0.5, 1.5])
+        self.assertEqual(self.graph.edge_source.tolist(), [0, 1, 2, 2])
+        self.assertEqual(self.graph.edge_target.tolist(), [2, 2, 3, 4])
+        self.assertEqual([self.graph.kind(i) for i in range(5)], ["IdentityMorphism", "IdentityMorphism",
+                                                                  "NamedMorphism", "IdentityMorphism",
+                                                                  "IdentityMorphism"])
+
+    def test_layout(self):
+        x, widths = DiagramGraph.layout(wires=[1, 2, 1, 3], counts=[3, 1])
+        self.assertEqual(x.tolist(), [0.5, 2.0, 3.5, 1.5])
+        self.assertEqual(widths.tolist(), [1.0, 2.0, 1.0, 3.0])
+
+        x, widths = DiagramGraph.layout(wires=[1, 2, 0, 1], counts=[2, 0, 2], padding=1, offset=10)
+        self.assertEqual(x.tolist(), [11.0, 14.0, 10.0, 11.0])
+        self.assertEqual(widths.tolist(), [2.0, 4.0, 0.0, 2.0])
+
+        x, widths = DiagramGraph.layout(wires=[], counts=[])
+        self.assertEqual(len(x), 0)
+
+    def test_copy(self):
+        graph = self.graph.copy(rows=2)
+        self.assertEqual(graph.size, (2, 2))
+        self.assertEqual(list(graph.nodes), ["id_{1}_(0)_(0)", "id_{2}_(0)_(1)", "f_(1)_(0)"])
+        self.assertEqual(graph.edge_count(), 2)
+        self.assertEqual(self.graph.row_range(2), (3, 5))
+
+        g = NamedMorphism(domain=MonoidalObject("3", "4"), codomain=MonoidalObject("5"), name="g")
+        graph = Diagram.graph_from_slices([[g]], graph=self.graph.copy(), above=Diagram(self.f).slices()[-1])
+        self.assertEqual(graph.size, (4, 2))
+        self.assertEqual(list(graph.edges)[-2:], ["[id_{3}_(2)_(0)]*[g_(3)_(0)]_3", "[id_{4}_(2)_(1)]*[g_(3)_(0)]_4"])
+        self.assertEqual(self.graph.node_count(), 5)
+
+    def test_views(self):
+        nodes, edges = self.graph.nodes, self.graph.edges
+        self.assertEqual(list(nodes), ["id_{1}_(0)_(0)", "id_{2}_(0)_(1)", "f_(1)_(0)", "id_{3}_(2)_(0)",
+                                       "id_{4}_(2)_(1)"])
+        self.assertEqual(nodes["f_(1)_(0)"], {"id": "f_(1)_(0)", "name": "f",
+                                              "index_position": {"y": 1, "x": 0},
+                                              "position": {"y": 1, "x": 1.0},
+                                              "type": "NamedMorphism", "width": 2.0})
+        self.assertEqual(edges["[id_{1}_(0)_(0)]*[f_(1)_(0)]_1"]["source_position"], {"y": 0, "x": 0.5})
+        self.assertEqual(edges["[id_{1}_(0)_(0)]*[f_(1)_(0)]_1"]["target_position"], {"y": 1, "x": 0.5})
+        self.assertEqual(len(list(edges.values())), 4)
+
+        # the dicts are copies
+        nodes["f_(1)_(0)"]["name"] = "g"
+        self.assertEqual(nodes["f_(1)_(0)"]["name"], "f")
+        self.assertRaises(KeyError, nodes.__getitem__, "g_(1)_(0)")
+
+    def test_repeated_wire(self):
+        # g takes both a's from f, both edges are kept
+        f = NamedMorphism(domain=MonoidalObject("x"), codomain=MonoidalObject("a", "a"), name="f")
+        g = NamedMorphism(domain=MonoidalObject("a", "a"), codomain=MonoidalObject("y"), name="g")
+        graph = Diagram.graph_from_slices([[IdentityMorphism(MonoidalObject("x"))], [f], [g]])
+        self.assertEqual(list(graph.edges), ["[id_{x}_(0)_(0)]*[f_(1)_(0)]_x",
+                                             "[f_(1)_(0)]*[g_(2)_(0)]_a",
+                                             "[f_(1)_(0)]*[g_(2)_(0)]_a_1"])
+
+    def test_to_vis(self):
+        cyto = self.graph.to_vis(scale=100, label_strings=False, color_nodes=True)
+        self.assertEqual(len(cyto), 9)
+        f = cyto[2]
+        self.assertEqual(f["data"]["label"], "f")
+        self.assertEqual(f["data"]["width"], 200.0)
+        self.assertEqual(f["position"], {"y": 100, "x": 100.0})
+        self.assertEqual(sorted(self.graph.colormap()), ["1", "2", "3", "4"])
+        self.assertEqual(cyto[0]["data"]["color"], self.graph.colormap()["1"])
+        edge = cyto[5]["data"]
+        self.assertEqual(edge, {"id": "[id_{1}_(0)_(0)]*[f_(1)_(0)]_1", "source_position": "0.0 50%",
+                                "target_position": "-50.0 -50%", "source": "id_{1}_(0)_(0)",
+                                "target": "f_(1)_(0)", "label": "1"})
+
+    def test_iter_vis(self):
+        # the elements of to_vis, row by row as Diagram.iter_vis streams them
+        for label_strings, color_nodes in ((True, False), (False, True)):
+            elements = list(self.graph.iter_vis(scale=100, label_strings=label_strings, color_nodes=color_nodes))
+            self.assertCountEqual(elements, self.graph.to_vis(scale=100, label_strings=label_strings,
+                                                              color_nodes=color_nodes))
+            self.assertEqual(elements, list(Diagram(self.f).iter_vis(label_strings=label_strings,
+                                                                     color_nodes=color_nodes)))
+        groups = [c["group"] for c in self.graph.iter_vis(scale=100)]
+        self.assertEqual(groups, ["nodes", "nodes", "nodes", "edges", "edges", "nodes", "nodes", "edges", "edges"])
+
+    def test_to_array(self):
+        array = self.graph.to_array()
+        self.assertEqual(array.tolist(), [[1, 2], [3, 3], [4, 5]])
+        self.assertEqual(array.dtype, np.uint8)
+        self.assertEqual(self.graph.array_names(), ["1", "2", "f", "3", "4"])
+
+        # boxes are drawn over the cells of their wires, not at their index in the slice
+        g = NamedMorphism(domain=MonoidalObject("x"), codomain=MonoidalObject("y"), name="g")
+        graph = Diagram(MonoidalMorphism(self.f, g)).graph()
+        self.assertEqual(graph.to_array().tolist(), [[1, 2, 3], [4, 4, 5], [6, 7, 8]])
+
+        wide = NamedMorphism(domain=MonoidalObject(*[str(i) for i in range(300)]), codomain=MonoidalObject("y"),
+                             name="wide")
+        array = Diagram(wide).graph().to_array()
+        self.assertEqual(array.dtype, np.uint16)
+        self.assertEqual(array.shape, (3, 300))
+        self.assertEqual(array[1].tolist(), [301] * 300)
+        self.assertEqual(array[2].tolist(), [302] + [0] * 299)
+
+        self.assertEqual(self.graph.to_array(size=(2, 3)).tolist(), [[1, 2, 0], [3, 3, 0]])
+
+    def test_from_dicts(self):
+        # plain dicts laid out like the views draw the same as the graph they were copied from
+        g = NamedMorphism(domain=MonoidalObject("3", "3"), codomain=MonoidalObject("y"), name="g")
+        graph = (Diagram(self.f) * Diagram(MonoidalMorphism(IdentityMorphism(MonoidalObject("3")), g))).graph()
+        nodes, edges = dict(graph.nodes.items()), dict(graph.edges.items())
+        self.assertEqual(Diagram.to_vis_from_graph(nodes, edges, filename=None, scale=100, color_nodes=True),
+                         graph.to_vis(scale=100, color_nodes=True))
+        self.assertEqual(Diagram.graph_to_array(nodes).tolist(), graph.to_array().tolist())
+        self.assertEqual(Diagram.graph_to_array(nodes, size=graph.size).shape, graph.size)
+
+    @unittest.skipUnless(importlib.util.find_spec("scipy"), "scipy is not installed")
+    def test_to_array_sparse(self):
+        sparse = self.graph.to_array(sparse=True)
+        self.assertEqual(sparse.shape, (3, 2))
+        self.assertEqual(sparse.toarray().tolist(), self.graph.to_array().tolist())
+
+    def test_braids(self):
+        swap = MonoidalMorphism(IdentityMorphism(MonoidalObject("1")),
+                                NamedMorphism(domain=MonoidalObject("2", "3"), codomain=MonoidalObject("3", "2"),
+                                              name="τ(2, 3)"))
+        cyto = Diagram(swap).graph().to_vis(scale=100)
+        tau = [c["data"] for c in cyto if c["group"] == "nodes" and c["data"]["type"] == "NamedMorphism"]
+        self.assertEqual(tau[0]["label"], "τ")
+        self.assertEqual(tau[0]["color"], "white")
+
+
+if __name__ == '__main__':
+    unittest.main()
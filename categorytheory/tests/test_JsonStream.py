@@ -0,0 +1,51 @@
+import io
+import json
+import os
+import unittest
+
+from categorytheory.Diagram import Diagram
+from categorytheory.JsonStream import JsonStream
+from categorytheory.MonoidalCategory import MonoidalObject, NamedMorphism
+
+
+class TestJsonStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.elements = [{"data": {"id": str(i), "label": "τ", "x": i / 2}} for i in range(100)]
+        self.filename = os.path.join(os.path.dirname(__file__), "test_stream.json")
+
+    def test_chunks(self):
+        chunks = list(JsonStream.chunks(iter(self.elements), buffer_size=256))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) < 256 + 64 for c in chunks))
+        self.assertEqual(json.loads(b"".join(chunks)), self.elements)
+        self.assertEqual(json.loads(b"".join(JsonStream.chunks([]))), [])
+
+    def test_write(self):
+        binary = io.BytesIO()
+        written = JsonStream.write(iter(self.elements), binary)
+        self.assertEqual(written, len(binary.getvalue()))
+        self.assertEqual(json.loads(binary.getvalue()), self.elements)
+
+        text = io.StringIO()
+        JsonStream.write(iter(self.elements), text)
+        self.assertEqual(json.loads(text.getvalue()), self.elements)
+
+    def test_write_vis(self):
+        f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3"), name="f"))
+        g = Diagram(NamedMorphism(domain=MonoidalObject("3"), codomain=MonoidalObject("4", "5"), name="g"))
+        sd = f * g
+        sd.write_vis(self.filename, color_nodes=True)
+        with open(self.filename) as infile:
+            self.assertCountEqual(json.load(infile), sd.to_vis(filename=None, color_nodes=True))
+
+        sd.to_vis(filename=self.filename)
+        with open(self.filename) as infile:
+            self.assertEqual(json.load(infile), sd.to_vis(filename=None))
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
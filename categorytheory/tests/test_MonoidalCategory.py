@@ -1,23 +1,25 @@
 import unittest
 
 from sympy import FiniteSet
-from sympy.categories import Object, CompositeMorphism, Diagram
+from sympy.categories import Object, Category, CompositeMorphism, Diagram
+from sympy.categories import NamedMorphism as SympyNamedMorphism, IdentityMorphism as SympyIdentityMorphism
 
-from categorytheory.MonoidalCategory import MonoidalObject, MonoidalMorphism, MonoidalCategory, NamedMorphism, IdentityMorphism
+from categorytheory.MonoidalCategory import MonoidalObject, MonoidalMorphism, MonoidalCategory, NamedMorphism, \
+    IdentityMorphism, from_sympy
 
 
 class TestMonoidalObject(unittest.TestCase):
     def test_instance_single_str(self):
         foo = MonoidalObject("a")
-        self.assertEqual(foo.objects, [Object("a")])
+        self.assertEqual(foo.objects, ["a"])
 
     def test_instance_multi_str(self):
         foo = MonoidalObject("a", "b")
-        self.assertEqual(foo.objects, [Object("a"), Object("b")])
+        self.assertEqual(foo.objects, ["a", "b"])
 
     def test_instance_multi_object(self):
         foo = MonoidalObject(Object("a"), Object("b"))
-        self.assertEqual(foo.objects, [Object("a"), Object("b")])
+        self.assertEqual(foo.objects, ["a", "b"])
 
     def test_name_attr(self):
         foo = MonoidalObject("a", "b")
@@ -28,7 +30,7 @@ class TestMonoidalObject(unittest.TestCase):
         bar = MonoidalObject("c", "d")
         foo = foo.tensor(bar)
         self.assertEqual(foo.name, "a @ b @ c @ d")
-        self.assertEqual(foo.objects, [Object("a"), Object("b"), Object("c"), Object("d")])
+        self.assertEqual(foo.objects, ["a", "b", "c", "d"])
 
     def test_tensor_multi(self):
         foo = MonoidalObject("a", "b")
@@ -36,14 +38,14 @@ class TestMonoidalObject(unittest.TestCase):
         bar2 = MonoidalObject("e", "f")
         foo = foo.tensor(bar1, bar2)
         self.assertEqual(foo.name, "a @ b @ c @ d @ e @ f")
-        self.assertEqual(foo.objects, [Object("a"), Object("b"), Object("c"), Object("d"), Object("e"), Object("f")])
+        self.assertEqual(foo.objects, ["a", "b", "c", "d", "e", "f"])
 
     def test_add(self):
         foo = MonoidalObject("a", "b")
         bar = MonoidalObject("c", "d")
         foo = foo + bar
         self.assertEqual(foo.name, "a @ b @ c @ d")
-        self.assertEqual(foo.objects, [Object("a"), Object("b"), Object("c"), Object("d")])
+        self.assertEqual(foo.objects, ["a", "b", "c", "d"])
 
     def test_count(self):
         foo = MonoidalObject("a", "b", "a")
@@ -56,8 +58,8 @@ class TestMonoidalObject(unittest.TestCase):
 
     def test_get_item(self):
         foo = MonoidalObject("a", "b")
-        self.assertEqual(foo[0], Object("a"))
-        self.assertEqual(foo[1], Object("b"))
+        self.assertEqual(foo[0], "a")
+        self.assertEqual(foo[1], "b")
 
     def test_iter(self):
         foo = MonoidalObject("a", "b")
@@ -67,6 +69,29 @@ class TestMonoidalObject(unittest.TestCase):
             self.assertTrue(False)
         self.assertTrue(True)
 
+    def test_interned(self):
+        foo = MonoidalObject("a", "b")
+        self.assertIs(foo, MonoidalObject(Object("a"), Object("b")))
+        self.assertIs(foo, MonoidalObject("a") + MonoidalObject("b"))
+        self.assertIs(foo[0:2], foo)
+        self.assertIsNot(foo, MonoidalObject("b", "a"))
+        self.assertEqual(hash(foo), hash("a @ b"))
+        self.assertEqual(foo.tuple_view, ("a", "b"))
+        self.assertEqual(foo.names, ("a", "b"))
+
+    def test_pickle(self):
+        import pickle
+        foo = MonoidalObject("a", "b")
+        self.assertIs(pickle.loads(pickle.dumps(foo)), foo)
+
+    def test_without_sympy(self):
+        # the core stores names, sympy is only imported to convert from and to it
+        import subprocess
+        import sys
+        code = "import sys, categorytheory.Diagram, categorytheory.CompositionCache; print('sympy' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
     def test_identity_morphism(self):
         foo = MonoidalObject("a", "b")
         id_foo = IdentityMorphism(foo)
@@ -83,8 +108,8 @@ class TestMonoidalObject(unittest.TestCase):
         f = NamedMorphism(domain=A, codomain=B, name="f")
         g = NamedMorphism(domain=B, codomain=C, name="g")
 
-        h = CompositeMorphism(f, g)
-        self.assertEqual(h, g * f)
+        h = CompositeMorphism(f.to_sympy(), g.to_sympy())
+        self.assertEqual(h, g.to_sympy() * f.to_sympy())
 
 
 class TestMonoidalMorphism(unittest.TestCase):
@@ -136,10 +161,12 @@ class TestMonoidalMorphism(unittest.TestCase):
     def test_domain_prop(self):
         self.assertEqual(self.m.domain, MonoidalObject("1", "2", "3", "4"))
         self.assertEqual(self.m_and_id.domain, MonoidalObject("1", "2", "1", "2"))
+        self.assertIs(self.m.domain, self.m.domain)
 
     def test_codomain_prop(self):
         self.assertEqual(self.m.codomain, MonoidalObject("3", "4", "5", "6"))
         self.assertEqual(self.m_and_id.codomain, MonoidalObject("3", "4", "1", "2"))
+        self.assertIs(self.m.codomain, self.m.codomain)
 
     def test_slice(self):
         # f @ g: (1 @ 2 @ 3 @ 4) --> (3 @ 4 @ 5 @ 6)
@@ -163,10 +190,36 @@ class TestMonoidalMorphism(unittest.TestCase):
         self.assertEqual(m_prime.codomain.name, "3 @ 4 @ 5 @ 6 @ 3 @ 4 @ 5 @ 6")
 
     def test_compose(self):
-        m_prime = self.g_monoidal * self.f_monoidal
+        m_prime = self.g_monoidal.to_sympy() * self.f_monoidal.to_sympy()
         self.assertEqual(m_prime.domain.name, "1 @ 2")
         self.assertEqual(m_prime.codomain.name, "5 @ 6")
-        self.assertEqual(m_prime.components, (self.f_monoidal, self.g_monoidal))
+        self.assertEqual(m_prime.components, (self.f_monoidal.to_sympy(), self.g_monoidal.to_sympy()))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.f, "__dict__"))
+        self.assertFalse(hasattr(self.id_A, "__dict__"))
+        self.assertFalse(hasattr(self.m, "__dict__"))
+
+    def test_to_sympy(self):
+        f = self.f.to_sympy()
+        self.assertIsInstance(f, SympyNamedMorphism)
+        self.assertEqual(f.domain, self.A)
+        self.assertEqual(f.name, "f")
+        self.assertIsInstance(self.id_A.to_sympy(), SympyIdentityMorphism)
+        self.assertEqual(self.m.to_sympy().domain, self.m.domain)
+        self.assertEqual(self.m.to_sympy().name, "f @ g")
+
+        import pickle
+        ids = MonoidalMorphism(self.id_A, IdentityMorphism(self.B)).to_sympy()
+        self.assertEqual(pickle.loads(pickle.dumps(ids)), ids)
+
+    def test_from_sympy(self):
+        self.assertEqual(from_sympy(self.f.to_sympy()), self.f)
+        self.assertEqual(from_sympy(self.id_A.to_sympy()), self.id_A)
+        self.assertEqual(from_sympy(self.m_and_id.to_sympy()), self.m_and_id)
+        self.assertEqual(from_sympy(SympyNamedMorphism(Object("1"), Object("3"), "h")),
+                         NamedMorphism(domain=MonoidalObject("1"), codomain=MonoidalObject("3"), name="h"))
+        self.assertRaises(TypeError, from_sympy, CompositeMorphism(self.f.to_sympy(), self.g.to_sympy()))
 
 
 class TestMonoidalCategory(unittest.TestCase):
@@ -183,16 +236,17 @@ class TestMonoidalCategory(unittest.TestCase):
 
     def test_init(self):
         objects = [self.A, self.B, self.C]
-        d = Diagram([self.f, self.g])
+        d = Diagram([self.f.to_sympy(), self.g.to_sympy()])
         C = MonoidalCategory(name="C", objects=objects, commutative_diagrams=[d])
 
         self.assertEqual(C.name, "C")
         self.assertEqual(C.objects.args[0], objects)
         self.assertEqual(C.commutative_diagrams, FiniteSet(d))
+        self.assertIsInstance(C.category, Category)
 
     def test_hom(self):
         objects = [self.A, self.B, self.C]
-        d = Diagram([self.f, self.g])
+        d = Diagram([self.f.to_sympy(), self.g.to_sympy()])
         C = MonoidalCategory(name="C", objects=objects, commutative_diagrams=[d])
 
         homset_A_C = C.hom(self.A, self.C)
@@ -203,19 +257,19 @@ class TestMonoidalCategory(unittest.TestCase):
 
     def test_morphisms(self):
         objects = [self.A, self.B, self.C]
-        d = Diagram([self.f, self.g])
+        d = Diagram([self.f.to_sympy(), self.g.to_sympy()])
         C = MonoidalCategory(name="C", objects=objects, commutative_diagrams=[d])
 
         morphisms = C.morphisms
 
-        self.assertIn(self.f, morphisms)
-        self.assertIn(self.g, morphisms)
+        self.assertIn(self.f.to_sympy(), morphisms)
+        self.assertIn(self.g.to_sympy(), morphisms)
 
-        self.assertIn(self.g * self.f, morphisms)
+        self.assertIn(self.g.to_sympy() * self.f.to_sympy(), morphisms)
 
-        self.assertIn(IdentityMorphism(self.A), morphisms)
-        self.assertIn(IdentityMorphism(self.B), morphisms)
-        self.assertIn(IdentityMorphism(self.C), morphisms)
+        self.assertIn(IdentityMorphism(self.A).to_sympy(), morphisms)
+        self.assertIn(IdentityMorphism(self.B).to_sympy(), morphisms)
+        self.assertIn(IdentityMorphism(self.C).to_sympy(), morphisms)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+import unittest
+
+
+from categorytheory.MonoidalCategory import MonoidalObject
+from categorytheory.Permutation import Permutation
+
+
+class TestPermutation(unittest.TestCase):
+    def test_between(self):
+        a = MonoidalObject("a", "b", "c", "d", "e")
+        b = MonoidalObject("a", "b", "e", "c", "d")
+        self.assertEqual(Permutation.between(a, b).target.tolist(), [0, 1, 3, 4, 2])
+        self.assertRaises(ValueError, Permutation.between, a, MonoidalObject("a", "b", "e", "c"))
+        self.assertRaises(ValueError, Permutation.between, a, MonoidalObject("a", "f", "e", "c", "d"))
+
+    def test_duplicates(self):
+        # repeated wires keep their order and never cross each other
+        perm = Permutation.between(["x", "a", "x"], ["x", "x", "a"])
+        self.assertEqual(perm.target.tolist(), [0, 2, 1])
+        self.assertEqual(perm.transpositions(), [1])
+
+    def test_inversions(self):
+        self.assertEqual(Permutation([0, 1, 2]).inversions(), 0)
+        self.assertEqual(Permutation([2, 1, 0]).inversions(), 3)
+        self.assertEqual(Permutation([0, 1, 3, 4, 2]).inversions(), 2)
+        self.assertEqual(Permutation([]).inversions(), 0)
+
+    def test_transpositions(self):
+        self.assertEqual(Permutation([0, 1, 3, 4, 2]).transpositions(), [3, 2])
+        self.assertEqual(Permutation([2, 1, 0]).transpositions(), [1, 0, 1])
+        self.assertEqual(Permutation([0, 1, 2]).transpositions(), [])
+
+        perm = Permutation([3, 0, 4, 1, 2])
+        wires = ["a", "b", "c", "d", "e"]
+        for k in perm.transpositions():
+            wires[k], wires[k + 1] = wires[k + 1], wires[k]
+        self.assertEqual(wires, perm.apply(["a", "b", "c", "d", "e"]))
+        self.assertEqual(len(perm.transpositions()), perm.inversions())
+
+    def test_layers(self):
+        self.assertEqual(Permutation([1, 0, 3, 2]).layers(), [[0, 2]])
+        self.assertEqual(Permutation([0, 1, 2]).layers(), [])
+        self.assertEqual(Permutation([3, 2, 1, 0]).layers(), [[0, 2], [1], [0, 2], [1]])
+
+        perm = Permutation([3, 0, 4, 1, 2, 6, 5])
+        wires = list(range(7))
+        for layer in perm.layers():
+            self.assertTrue(all(k2 - k1 >= 2 for k1, k2 in zip(layer, layer[1:])))  # disjoint wires
+            for k in layer:
+                wires[k], wires[k + 1] = wires[k + 1], wires[k]
+        self.assertEqual(wires, perm.apply(list(range(7))))
+        self.assertEqual(sum(len(layer) for layer in perm.layers()), perm.inversions())
+        self.assertLessEqual(len(perm.layers()), len(perm))
+
+    def test_swaps(self):
+        a = MonoidalObject("a", "b", "c", "d", "e").objects
+        perm = Permutation([0, 1, 3, 4, 2])
+        self.assertEqual(perm.swaps(a), [("d", "e"), ("c", "e")])
+
+    def test_reduce_word(self):
+        self.assertEqual(Permutation.from_word([3, 2], 5).target.tolist(), [0, 1, 3, 4, 2])
+        self.assertEqual(Permutation.reduce_word([2, 2], 4), [])
+        self.assertEqual(Permutation.reduce_word([0, 1, 0, 1], 3), [1, 0])  # braid move, then cancel
+        self.assertEqual(Permutation.reduce_word([3, 2], 5), [3, 2])
+
+    def test_inverse(self):
+        perm = Permutation([3, 0, 4, 1, 2])
+        self.assertEqual(perm.inverse().target.tolist(), [1, 3, 4, 0, 2])
+        self.assertEqual(perm.inverse().apply(perm.apply(["a", "b", "c", "d", "e"])), ["a", "b", "c", "d", "e"])
+        self.assertTrue(Permutation([0, 1, 2]).is_identity())
+        self.assertFalse(perm.is_identity())
+        self.assertEqual(len(perm), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import struct
+import unittest
+import zlib
+
+import numpy as np
+
+from categorytheory.Diagram import Diagram
+from categorytheory.MonoidalCategory import MonoidalObject, NamedMorphism
+from categorytheory.Png import Png
+
+
+def decode(data: bytes) -> (dict, np.ndarray):
+    # header fields and pixels of a PNG with filter type 0 scanlines
+    assert data[:8] == Png.SIGNATURE
+    position, chunks = 8, []
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind, body = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body) & 0xffffffff
+        chunks.append((kind, body))
+        position += 12 + length
+    assert chunks[0][0] == b"IHDR" and chunks[-1] == (b"IEND", b"")
+    width, height, depth, color_type, _, _, _ = struct.unpack(">IIBBBBB", chunks[0][1])
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    channels = 3 if color_type == 2 else 1
+    scanlines = np.frombuffer(raw, dtype=np.uint8).reshape(height, 1 + width * channels)
+    assert not scanlines[:, 0].any()
+    pixels = scanlines[:, 1:].reshape(height, width, channels)
+    return {"width": width, "height": height, "depth": depth, "color_type": color_type}, pixels
+
+
+class TestPng(unittest.TestCase):
+    def setUp(self) -> None:
+        f = NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4"), name="f")
+        self.graph = Diagram(f).graph()
+        self.array = self.graph.to_array()  # [[1 2] [3 3] [4 5]]
+
+    def test_grey(self):
+        header, pixels = decode(Png.encode(self.array))
+        self.assertEqual(header, {"width": 2, "height": 3, "depth": 8, "color_type": 0})
+        self.assertEqual(pixels[:, :, 0].tolist(), [[51, 102], [153, 153], [204, 255]])
+
+    def test_palette_upscale(self):
+        palette = self.graph.array_palette()
+        self.assertEqual(palette.shape, (6, 3))
+        self.assertEqual(palette[0].tolist(), [255, 255, 255])
+
+        header, pixels = decode(Png.encode(self.array, palette=palette, upscale=3))
+        self.assertEqual((header["width"], header["height"], header["color_type"]), (6, 9, 2))
+        self.assertEqual(pixels[0, 0].tolist(), palette[1].tolist())
+        self.assertEqual(pixels[2, 5].tolist(), palette[2].tolist())
+        self.assertEqual(pixels[8, 5].tolist(), palette[5].tolist())
+
+    def test_chunks(self):
+        # rows are compressed a block at a time
+        array = np.arange(1000 * 4).reshape(1000, 4) % 7
+        chunks = list(Png.chunks(array))
+        self.assertGreater(len(chunks), 4)
+        _, pixels = decode(b"".join(chunks))
+        self.assertEqual(pixels[:, :, 0].tolist(), (array * 255 // 6).tolist())
+
+    def test_empty(self):
+        header, pixels = decode(Png.encode(np.zeros((0, 0), dtype=np.uint8)))
+        self.assertEqual((header["width"], header["height"]), (1, 1))
+        self.assertRaises(ValueError, Png.encode, self.array, upscale=0)
+        self.assertRaises(ValueError, Png.encode, np.zeros(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
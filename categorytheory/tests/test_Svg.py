@@ -0,0 +1,48 @@
+import unittest
+import xml.etree.ElementTree as ET
+
+from sympy.categories import Object
+
+from categorytheory.Diagram import Diagram
+from categorytheory.MonoidalCategory import MonoidalObject, NamedMorphism
+from categorytheory.Svg import Svg
+from categorytheory.SymmetricMonoidalCategory import SymmetricMonoidalCategory
+
+NS = "{http://www.w3.org/2000/svg}"
+
+
+class TestSvg(unittest.TestCase):
+    def setUp(self) -> None:
+        self.f = Diagram(NamedMorphism(domain=MonoidalObject("1", "2"), codomain=MonoidalObject("3", "4"), name="f"))
+        self.g = Diagram(NamedMorphism(domain=MonoidalObject("4", "3"), codomain=MonoidalObject("a<b"), name="g&h"))
+
+    def test_render(self):
+        graph = self.f.graph()
+        svg = ET.fromstring(Svg.render(graph))
+        self.assertEqual(svg.attrib["viewBox"], "-50.00 -50.00 300.00 300.00")
+        self.assertEqual(len(svg.findall(NS + "g")), graph.rows)
+        self.assertEqual(len(svg.findall(".//" + NS + "line")), graph.edge_count())
+        rect = svg.find(".//" + NS + "rect")
+        self.assertEqual((rect.attrib["x"], rect.attrib["width"], rect.attrib["height"]), ("0.00", "200.00", "50.00"))
+        self.assertEqual([t.text for t in svg.iter(NS + "text")], ["1", "2", "f", "3", "4"])
+
+    def test_braids_and_escaping(self):
+        sd = self.f * self.g  # a braid swaps 3 and 4
+        svg = ET.fromstring(Svg.render(sd.graph(), label_strings=False, color_nodes=True))
+        labels = [t.text for t in svg.iter(NS + "text")]
+        self.assertIn("τ", labels)
+        self.assertIn("g&h", labels)
+        self.assertEqual(labels[-1], "a<b")  # strings are labelled in the last row
+        tau = [r for r in svg.iter(NS + "rect") if r.attrib["fill"] == "white"]
+        self.assertEqual(len(tau), 1)
+        self.assertTrue(all(c.attrib["fill"].startswith("rgb(") for c in svg.iter(NS + "circle")))
+
+    def test_chunks(self):
+        sd = self.f * Diagram(SymmetricMonoidalCategory.swap(Object("3"), Object("4")))
+        chunks = list(Svg.chunks(sd.graph()))
+        self.assertEqual(len(chunks), sd.graph().rows + 2)  # header, one per row, closing tag
+        self.assertEqual("".join(chunks), Svg.render(sd.graph()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,7 +21,7 @@ class TestSymmetricMonoidalCategory(unittest.TestCase):
 
     def test_init(self):
         objects = [self.A, self.B, self.C]
-        d = Diagram([self.f, self.g])
+        d = Diagram([self.f.to_sympy(), self.g.to_sympy()])
         C = MonoidalCategory(name="C", objects=objects, commutative_diagrams=[d])
 
         self.assertEqual(C.name, "C")
@@ -67,7 +67,8 @@ class TestSymmetricMonoidalCategory(unittest.TestCase):
         self.assertEqual(SymmetricMonoidalCategory.apply_braid_identity(t1, t2), IdentityMorphism(MonoidalObject(x, y)))
 
         t2 = MonoidalMorphism(NamedMorphism(domain=MonoidalObject(y, x), codomain=MonoidalObject("foo"), name="t2"))
-        self.assertEqual(SymmetricMonoidalCategory.apply_braid_identity(t1, t2), CompositeMorphism(t1, t2))
+        self.assertEqual(SymmetricMonoidalCategory.apply_braid_identity(t1, t2),
+                         CompositeMorphism(t1.to_sympy(), t2.to_sympy()))
 
         t2 = MonoidalMorphism(NamedMorphism(domain=MonoidalObject(z, x), codomain=MonoidalObject("foo"), name="t2"))
         self.assertRaises(ValueError, SymmetricMonoidalCategory.apply_braid_identity, t1, t2)
@@ -81,19 +82,61 @@ class TestSymmetricMonoidalCategory(unittest.TestCase):
         t1 = SymmetricMonoidalCategory.swap(x, y)
         t2 = SymmetricMonoidalCategory.swap(y, x)
         t3 = SymmetricMonoidalCategory.swap(x, z)
-        t4 = SymmetricMonoidalCategory.swap(z, y)
 
         # Tests
-        new_swaps = SymmetricMonoidalCategory.simplify([t1, t2, t3, t4])
-        self.assertEqual(new_swaps, [t3, t4])
+        # x y z => y x z => x y z => y x z => y z x
+        new_swaps = SymmetricMonoidalCategory.simplify([t1, t2, t1, t3], objects=[x, y, z])
+        self.assertEqual(new_swaps, [t1, t3])
 
-        t4 = SymmetricMonoidalCategory.swap(x, y)
-        new_swaps = SymmetricMonoidalCategory.simplify([t1, t2, t3, t4])
-        self.assertEqual(new_swaps, [t3, t4])
-
-        new_swaps = SymmetricMonoidalCategory.simplify([t1])
+        new_swaps = SymmetricMonoidalCategory.simplify([t1], objects=[x, y, z])
         self.assertEqual(new_swaps, [t1])
-        pass
+
+        # last two cancel, and cancellations that make new neighbours
+        self.assertEqual(SymmetricMonoidalCategory.simplify([t1, t3, SymmetricMonoidalCategory.swap(z, x)],
+                                                            objects=[x, y, z]), [t1])
+        t3_inv = SymmetricMonoidalCategory.swap(z, x)
+        self.assertEqual(SymmetricMonoidalCategory.simplify([t1, t3, t3_inv, t2], objects=[x, y, z]), [])
+
+    def test_simplify_reduced_word(self):
+        x = Object("x")
+        y = Object("y")
+        z = Object("z")
+
+        # x y z => y x z => y z x => z y x => z x y, two crossings are enough
+        swaps = [SymmetricMonoidalCategory.swap(x, y), SymmetricMonoidalCategory.swap(x, z),
+                 SymmetricMonoidalCategory.swap(y, z), SymmetricMonoidalCategory.swap(y, x)]
+        new_swaps = SymmetricMonoidalCategory.simplify(swaps, objects=[x, y, z])
+        self.assertEqual(new_swaps, [SymmetricMonoidalCategory.swap(y, z), SymmetricMonoidalCategory.swap(x, z)])
+
+        # ... => x z y, no pair of the five swaps cancels next to each other but one crossing is enough
+        swaps = swaps + [SymmetricMonoidalCategory.swap(z, x)]
+        self.assertEqual(SymmetricMonoidalCategory.simplify(swaps, objects=[x, y, z]),
+                         [SymmetricMonoidalCategory.swap(y, z)])
+
+        swaps = swaps[:2] + [SymmetricMonoidalCategory.swap(z, x), SymmetricMonoidalCategory.swap(y, x)]
+        self.assertEqual(SymmetricMonoidalCategory.simplify(swaps, objects=["x", "y", "z"]), [])
+
+        self.assertRaises(ValueError, SymmetricMonoidalCategory.simplify,
+                          [SymmetricMonoidalCategory.swap(x, z)], [x, y, z])
+
+    def test_simplify_repeated_wires(self):
+        x = Object("x")
+        y = Object("y")
+        xy = SymmetricMonoidalCategory.swap(x, y)
+        yx = SymmetricMonoidalCategory.swap(y, x)
+        xx = SymmetricMonoidalCategory.swap(x, x)
+
+        # x y x => y x x => y x x => x y x, crossing the two x changes nothing
+        self.assertEqual(SymmetricMonoidalCategory.simplify([xy, xx, yx], objects=[x, y, x]), [])
+        self.assertEqual(SymmetricMonoidalCategory.simplify([xy, xx], objects=[x, y, x]), [xy])
+
+        # x y x y: (x y) can act at 0 or 2
+        self.assertRaises(ValueError, SymmetricMonoidalCategory.simplify, [xy], [x, y, x, y])
+        # x y x y => x y y x => x y x y
+        self.assertEqual(SymmetricMonoidalCategory.simplify([xy, yx], [x, y, x, y], positions=[2, 2]), [])
+        # x y x y => y x x y => y x y x, the x and y in the middle never cross
+        self.assertEqual(SymmetricMonoidalCategory.simplify([xy, xy], [x, y, x, y], positions=[0, 2]), [xy, xy])
+        self.assertRaises(ValueError, SymmetricMonoidalCategory.simplify, [xy], [x, y, x, y], positions=[1])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+from sympy.categories import Object
+
+from categorytheory.MonoidalCategory import MonoidalObject, IdentityMorphism
+from categorytheory.WireAlphabet import WireAlphabet
+
+
+class TestWireAlphabet(unittest.TestCase):
+    def test_code(self):
+        alphabet = WireAlphabet(["a", "b"])
+        self.assertEqual(alphabet.code("a"), 0)
+        self.assertEqual(alphabet.code("b"), 1)
+        self.assertEqual(alphabet.code("c"), 2)
+        self.assertEqual(alphabet.code("a"), 0)
+        self.assertEqual(len(alphabet), 3)
+        self.assertIn("c", alphabet)
+        self.assertEqual(alphabet.name(2), "c")
+
+    def test_encode(self):
+        alphabet = WireAlphabet()
+        codes = alphabet.encode(MonoidalObject("a", "b", "a"))
+        self.assertEqual(codes.dtype, np.int32)
+        self.assertEqual(codes.tolist(), [0, 1, 0])
+        self.assertEqual(alphabet.encode([Object("b"), IdentityMorphism(Object("c"))]).tolist(), [1, 2])
+        self.assertEqual(alphabet.encode([]).tolist(), [])
+
+    def test_decode(self):
+        alphabet = WireAlphabet()
+        foo = MonoidalObject("a", "b", "a")
+        self.assertIs(alphabet.decode(alphabet.encode(foo)), foo)
+
+    def test_permutation(self):
+        # a b a c => c a a b
+        a = np.array([0, 1, 0, 2], dtype=np.int32)
+        b = np.array([2, 0, 0, 1], dtype=np.int32)
+        self.assertEqual(WireAlphabet.permutation(a, b).tolist(), [1, 3, 2, 0])
+        self.assertRaises(ValueError, WireAlphabet.permutation, a, b[:3])
+        self.assertRaises(ValueError, WireAlphabet.permutation, a, np.array([2, 0, 1, 1], dtype=np.int32))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,16 @@
-import os
-from functools import reduce
+import itertools
 
-import numpy as np
-from matplotlib import pyplot as plt
 import pydash
-from fastapi import FastAPI, Request, Body
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Body, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from categorytheory.Diagram import Diagram
+from categorytheory.CompositionCache import CompositionCache
+from categorytheory.Diagram import Diagram, StringDiagram
+from categorytheory.JsonStream import JsonStream
+from categorytheory.Png import Png
+from categorytheory.Svg import Svg
 from categorytheory.MonoidalCategory import MonoidalObject, NamedMorphism
 
 templates = Jinja2Templates(directory="wsgi/templates")
@@ -18,6 +19,12 @@ app = FastAPI()
 
 app.mount("/static", StaticFiles(directory="wsgi/static"), name="static")
 
+# the front end re-posts overlapping compose lists while navigating decompositions
+composition_cache = CompositionCache(maxsize=256)
+
+# pixels per raster cell of /to_image are capped, a large diagram is already thousands of cells wide
+MAX_UPSCALE = 16
+
 
 @app.get("/")
 async def read_root(request: Request, response_class=HTMLResponse):
@@ -29,13 +36,13 @@ async def read_data(request: Request, message: str):
     return message
 
 
-@app.post("/build_string_diagram")
-def build_string_diagram(request: Request, data: dict = Body(...)):
+def compose_request(data: dict) -> StringDiagram or None:
+    # the morphisms named in the body's compose list, composed in order, None if one is missing or they do not
+    # compose
     morphisms_dict = pydash.get(data, "morphisms", dict())
     morphisms_to_compose = pydash.get(data, "compose", [])
-    scale = pydash.get(data, "scale", 100)
-    labels = pydash.get(data, "labels", True)
-    color = pydash.get(data, "color", False)
+    pack_braids = pydash.get(data, "pack_braids", False)
+    compact = pydash.get(data, "compact", False)
 
     # convert to category theory morphisms
     to_compose = []
@@ -43,9 +50,8 @@ def build_string_diagram(request: Request, data: dict = Body(...)):
         value = pydash.get(morphisms_dict, key, None)
 
         if value is None:
-            msg = "Cannot find morphism with key: {}!".format(key)
-            print(msg)
-            return 500, msg
+            print("Cannot find morphism with key: {}!".format(key))
+            return None
 
         name = pydash.get(value, "name")
         inputs = MonoidalObject(*pydash.get(value, "input", []))
@@ -56,42 +62,65 @@ def build_string_diagram(request: Request, data: dict = Body(...)):
         to_compose.append(diagram)
 
     try:
-        sd = reduce(lambda x, y: x * y, to_compose)
+        sd = composition_cache.compose(to_compose, pack_braids=pack_braids)
     except ValueError:
+        return None
+
+    if compact:
+        sd = sd.compact()
+    return sd
+
+
+@app.post("/build_string_diagram")
+def build_string_diagram(request: Request, data: dict = Body(...)):
+    scale = pydash.get(data, "scale", 100)
+    labels = pydash.get(data, "labels", True)
+    color = pydash.get(data, "color", False)
+
+    sd = compose_request(data)
+    if sd is None:
         return 500
 
-    return sd.to_vis(filename=None, scale=scale, label_strings=labels, color_nodes=color)
+    # elements are sent row by row, edges always come after both of their nodes. They are read from the graph kept on
+    # the diagram, so a diagram drawn before is not laid out again and one extending it only lays out its new layers
+    elements = sd.graph().iter_vis(scale=scale, label_strings=labels, color_nodes=color)
+    return StreamingResponse(JsonStream.chunks(elements), media_type="application/json")
 
 
 @app.post("/to_image")
 def get_string_diagram_to_image(request: Request, data: dict = Body(...)):
-    morphisms_dict = pydash.get(data, "morphisms", dict())
-    morphisms_to_compose = pydash.get(data, "compose", [])
+    upscale = pydash.get(data, "upscale", 1)
+    palette = pydash.get(data, "palette", False)
+    if isinstance(upscale, bool) or not isinstance(upscale, int) or upscale < 1:
+        raise HTTPException(status_code=422, detail="upscale must be a positive integer!")
+    upscale = min(upscale, MAX_UPSCALE)
+
+    sd = compose_request(data)
+    if sd is None:
+        return 500
 
-    # convert to category theory morphisms
-    to_compose = []
-    for key in morphisms_to_compose:
-        value = pydash.get(morphisms_dict, key, None)
+    graph = sd.graph()
+    png = Png.chunks(graph.to_array(), palette=graph.array_palette() if palette else None, upscale=upscale)
+    try:
+        head = next(png)  # the arguments are checked before the first chunk, while an error can still be sent
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return StreamingResponse(itertools.chain([head], png), media_type="image/png")
 
-        if value is None:
-            msg = "Cannot find morphism with key: {}!".format(key)
-            print(msg)
-            return 500, msg
 
-        name = pydash.get(value, "name")
-        inputs = MonoidalObject(*pydash.get(value, "input", []))
-        outputs = MonoidalObject(*pydash.get(value, "output", []))
-
-        diagram = Diagram(NamedMorphism(domain=inputs, codomain=outputs, name=name))
+@app.post("/to_svg")
+def get_string_diagram_to_svg(request: Request, data: dict = Body(...)):
+    scale = pydash.get(data, "scale", 100)
+    labels = pydash.get(data, "labels", True)
+    color = pydash.get(data, "color", False)
 
-        to_compose.append(diagram)
+    sd = compose_request(data)
+    if sd is None:
+        return 500
 
-    sd = reduce(lambda x, y: x * y, to_compose)
-    myarray = sd.to_array()
-    myarray = myarray / np.amax(myarray) * 255
-    myarray.astype('uint8')
-    plt.imsave(os.path.join(os.path.dirname(os.path.realpath(__file__)), "static", "downloads", "image.png"), myarray)
-    return 200
+    # one vector image instead of every element for the client to lay out, sent row by row
+    svg = Svg.chunks(sd.graph(), scale=scale, label_strings=labels, color_nodes=color)
+    return StreamingResponse(svg, media_type="image/svg+xml")
 
 
 def find_root(tree: dict):